@@ -0,0 +1,219 @@
+"""Spending analytics across shopping lists, vectorized with NumPy.
+
+Each list's columns (see ShoppingList) are turned into NumPy arrays and
+reduced with bincount/argpartition. The per-list results are cached by the
+list's version and budget (or, for lists read from another user's shard, by
+the list file's size and modification time), so a dashboard only recomputes
+lists that changed and combines the rest from cache.
+"""
+import heapq
+import os
+
+import numpy as np
+
+from shopping_list import ShoppingList
+
+
+def purchased_mask(items):
+    """Boolean array of the purchased flags of a ShoppingList."""
+    bits = np.frombuffer(bytes(items.purchased.bits), dtype=np.uint8)
+    return np.unpackbits(bits, bitorder="little")[:len(items)].astype(bool)
+
+
+def list_stats(items, budget, top=10):
+    """Reduce one list to totals, per-category totals and its top items by price."""
+    prices = np.array(items.prices, dtype=np.float64)
+    purchased = purchased_mask(items)
+    codes = np.array(items.category_codes, dtype=np.intp)
+    size = len(items.category_names)
+    spent_by_category = np.bincount(codes, weights=np.where(purchased, prices, 0.0), minlength=size)
+    total_by_category = np.bincount(codes, weights=prices, minlength=size)
+    pending_by_category = total_by_category - spent_by_category
+
+    if len(prices) > top:
+        rows = np.argpartition(-prices, top)[:top]
+    else:
+        rows = np.arange(len(prices))
+    rows = rows[np.argsort(-prices[rows], kind="stable")]
+
+    return {
+        "items": len(prices),
+        "budget": budget,
+        "spent": float(spent_by_category.sum()),
+        "pending": float(pending_by_category.sum()),
+        "categories": {
+            name: (float(spent_by_category[code]), float(pending_by_category[code]))
+            for code, name in enumerate(items.category_names)
+            if total_by_category[code]
+        },
+        "top_items": [items[int(row)] for row in rows],
+    }
+
+
+class SpendingAnalytics:
+    """Builds spending reports over many lists, caching per-list results."""
+
+    def __init__(self, top=10):
+        self.top = top
+        self._cache = {}  # (owner, list name) -> ((version, budget), stats) for lists in memory
+        self._stored = {}  # (username, list name) -> (list file stamp, stats) for lists read from a store
+        self._snapshot_users = {}  # username -> (snapshot file stamp, {list name: stats}) for users without a shard
+
+    def stats(self, key, shopping_list):
+        """Return list_stats for a list, reusing the cached result if it has not changed."""
+        items = shopping_list["items"]
+        stamp = (items.version, shopping_list["budget"])
+        cached = self._cache.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = self._cache[key] = (stamp, list_stats(items, shopping_list["budget"], self.top))
+        return cached[1]
+
+    def stored_stats(self, store, username, list_name):
+        """Return list_stats for a list saved in a UserStore, reading the file only if it changed.
+
+        Returns None if the list file does not exist.
+        """
+        try:
+            status = os.stat(store.list_path(username, list_name))
+        except FileNotFoundError:
+            return None
+        stamp = ("file", status.st_ino, status.st_mtime_ns, status.st_size)
+        key = (username, list_name)
+        cached = self._stored.get(key)
+        if cached is None or cached[0] != stamp:
+            shopping_list = store.load_list(username, list_name)
+            cached = self._stored[key] = (stamp, list_stats(shopping_list["items"], shopping_list["budget"], self.top))
+        return cached[1]
+
+    def stored_stats_by_list(self, store, skip=()):
+        """Return {(username, list_name): list_stats} for every user in a UserStore except those in skip.
+
+        Only the account records are read, plus the list files that changed
+        since the last call. This uses a cache of its own and reads only
+        files, so it may run on a worker thread while report() runs on the
+        Tk thread.
+        """
+        stats = {}
+        snapshot = store.snapshot()
+        snapshot_users = set()
+        for username in store.usernames():
+            if username in skip:
+                continue
+            if not store.has_shard(username):
+                # Decode straight from the snapshot rather than writing the user's shard
+                snapshot_users.add(username)
+                for list_name, entry in self.snapshot_stats(snapshot, username).items():
+                    stats[(username, list_name)] = entry
+                continue
+            for list_name in store.load_account(username).get("lists", []):
+                entry = self.stored_stats(store, username, list_name)
+                if entry is not None:
+                    stats[(username, list_name)] = entry
+        for key in [key for key in self._stored if key not in stats]:
+            del self._stored[key]  # Deleted lists and users
+        for username in [username for username in self._snapshot_users if username not in snapshot_users]:
+            del self._snapshot_users[username]
+        return stats
+
+    def snapshot_stats(self, snapshot, username):
+        """Return {list_name: list_stats} for a user in a snapshot.Snapshot, cached until the file changes."""
+        status = os.stat(snapshot.path)
+        stamp = (status.st_ino, status.st_mtime_ns, status.st_size)
+        cached = self._snapshot_users.get(username)
+        if cached is None or cached[0] != stamp:
+            lists = {}
+            for list_name, shopping_list in snapshot.user_json(username)["shopping_lists"].items():
+                items = ShoppingList.from_json(shopping_list["items"])
+                lists[list_name] = list_stats(items, shopping_list["budget"], self.top)
+            cached = self._snapshot_users[username] = (stamp, lists)
+        return cached[1]
+
+    def report(self, shopping_lists, owner=None):
+        """Report on one user's lists. owner namespaces cache keys when several users are analyzed."""
+        stats = {list_name: self.stats((owner, list_name), shopping_list)
+                 for list_name, shopping_list in shopping_lists.items()}
+        for key in [key for key in self._cache if key[0] == owner and key[1] not in shopping_lists]:
+            del self._cache[key]  # Deleted lists
+        return self.combine({(owner, list_name): list_stats for list_name, list_stats in stats.items()})
+
+    def report_all_users(self, store, loaded=None, stored=None):
+        """Report across every user in a UserStore.
+
+        loaded maps usernames to shopping_lists already in memory (such as the
+        logged-in user's, which may have unsaved changes); those are used
+        instead of reading the store. stored is the result of
+        stored_stats_by_list(store, loaded) if the caller already has it,
+        for example from a worker thread.
+        """
+        loaded = loaded or {}
+        if stored is None:
+            stored = self.stored_stats_by_list(store, loaded)
+        stats = dict(stored)
+        for username, shopping_lists in loaded.items():
+            for list_name, shopping_list in shopping_lists.items():
+                stats[(username, list_name)] = self.stats((username, list_name), shopping_list)
+        for key in [key for key in self._cache if key[0] in loaded and key not in stats]:
+            del self._cache[key]  # Deleted lists
+        return self.combine(stats)
+
+    def combine(self, stats):
+        """Merge per-list stats keyed by (owner, list_name) into one report dict."""
+        by_category = {}
+        utilization = []
+        top_items = []
+        for (owner, list_name), entry in stats.items():
+            label = list_name if owner is None else f"{owner}/{list_name}"
+            for category, (spent, pending) in entry["categories"].items():
+                totals = by_category.setdefault(category, [0.0, 0.0])
+                totals[0] += spent
+                totals[1] += pending
+            utilization.append({
+                "list": label,
+                "budget": entry["budget"],
+                "spent": entry["spent"],
+                "utilization": entry["spent"] / entry["budget"] if entry["budget"] else None,
+                "exceeded": max(0.0, entry["spent"] - entry["budget"]),
+            })
+            top_items.extend((item[1], label, item) for item in entry["top_items"])
+
+        utilization.sort(key=lambda row: -1 if row["utilization"] is None else row["utilization"], reverse=True)
+        return {
+            "lists": len(stats),
+            "items": sum(entry["items"] for entry in stats.values()),
+            "budget": sum(entry["budget"] for entry in stats.values()),
+            "spent": sum(entry["spent"] for entry in stats.values()),
+            "pending": sum(entry["pending"] for entry in stats.values()),
+            "by_category": dict(sorted(
+                ((category, {"spent": spent, "pending": pending}) for category, (spent, pending) in by_category.items()),
+                key=lambda entry: entry[1]["spent"] + entry[1]["pending"], reverse=True,
+            )),
+            "budget_utilization": utilization,
+            "over_budget": [row for row in utilization if row["exceeded"] > 0],
+            "top_items": [
+                {"list": label, "name": item[0], "price": item[1], "purchased": item[2], "category": item[3]}
+                for _price, label, item in heapq.nlargest(self.top, top_items, key=lambda entry: entry[0])
+            ],
+        }
+
+
+def format_report(report):
+    """Render a report as plain text for the dashboard window and the CLI."""
+    lines = [
+        f"Lists: {report['lists']}   Items: {report['items']}",
+        f"Budget: ${report['budget']:.2f}   Spent: ${report['spent']:.2f}   Pending: ${report['pending']:.2f}",
+        "",
+        "Spending by category:",
+    ]
+    for category, totals in report["by_category"].items():
+        lines.append(f"  {category:<16} spent ${totals['spent']:>10.2f}   pending ${totals['pending']:>10.2f}")
+    lines += ["", "Budget utilization:"]
+    for row in report["budget_utilization"]:
+        used = "no budget" if row["utilization"] is None else f"{row['utilization']:.0%}"
+        lines.append(f"  {row['list']:<24} {used:>9}  (${row['spent']:.2f} of ${row['budget']:.2f})")
+    lines += ["", "Over budget:"]
+    lines += [f"  {row['list']:<24} by ${row['exceeded']:.2f}" for row in report["over_budget"]] or ["  none"]
+    lines += ["", "Top items by price:"]
+    for item in report["top_items"]:
+        status = "Purchased" if item["purchased"] else "Not Purchased"
+        lines.append(f"  {item['name']} - ${item['price']:.2f} - {status} - {item['category']} ({item['list']})")
+    return "\n".join(lines)
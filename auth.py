@@ -0,0 +1,102 @@
+import hashlib
+import hmac
+import os
+import threading
+
+from storage import atomic_write_json, read_json
+
+# Default work factors. scrypt's n must be a power of two; each doubling
+# roughly doubles both the time and memory needed to hash one password.
+SCRYPT_N = int(os.environ.get("PLANNER_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.environ.get("PLANNER_PBKDF2_ITERATIONS", 600_000))
+
+
+def hash_password(password, scrypt_n=SCRYPT_N, pbkdf2_iterations=PBKDF2_ITERATIONS):
+    """Return a credential record holding a salted hash of password.
+
+    Uses scrypt when the interpreter's OpenSSL provides it and PBKDF2-SHA256
+    otherwise.
+    """
+    salt = os.urandom(16)
+    if hasattr(hashlib, "scrypt"):
+        record = {"algorithm": "scrypt", "n": scrypt_n, "r": SCRYPT_R, "p": SCRYPT_P}
+    else:
+        record = {"algorithm": "pbkdf2_sha256", "iterations": pbkdf2_iterations}
+    record["salt"] = salt.hex()
+    record["hash"] = _derive(password, salt, record).hex()
+    return record
+
+
+def verify_password(password, record):
+    """Check password against a credential record in constant time."""
+    digest = _derive(password, bytes.fromhex(record["salt"]), record)
+    return hmac.compare_digest(digest, bytes.fromhex(record["hash"]))
+
+
+def _derive(password, salt, record):
+    password = password.encode("utf-8")
+    if record["algorithm"] == "scrypt":
+        n, r, p = record["n"], record["r"], record["p"]
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p,
+                              maxmem=128 * r * (n + p + 2) + 1024 * 1024, dklen=32)
+    if record["algorithm"] == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password, salt, record["iterations"])
+    raise ValueError(f"Unknown password hash algorithm: {record['algorithm']}")
+
+
+class CredentialStore:
+    """Username -> password hash index, kept apart from all list data.
+
+    The whole index is one small JSON file, so checking a password never
+    reads a user's shard. The file is re-read only when it changes on disk
+    and written atomically.
+    """
+
+    def __init__(self, path, scrypt_n=SCRYPT_N, pbkdf2_iterations=PBKDF2_ITERATIONS):
+        self.path = path
+        self.scrypt_n = scrypt_n
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self._lock = threading.Lock()
+        self._records = {}
+        self._mtime = None
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime != self._mtime:
+            self._records = read_json(self.path) if mtime is not None else {}
+            self._mtime = mtime
+
+    def __contains__(self, username):
+        with self._lock:
+            self._load()
+            return username in self._records
+
+    def get(self, username):
+        with self._lock:
+            self._load()
+            return self._records.get(username)
+
+    def set_password(self, username, password):
+        """Hash password with the current work factor and store it."""
+        record = hash_password(password, self.scrypt_n, self.pbkdf2_iterations)
+        with self._lock:
+            self._load()
+            self._records[username] = record
+            atomic_write_json(self.path, self._records)
+            self._mtime = os.path.getmtime(self.path)
+
+    def verify(self, username, password):
+        """Return True if password matches. Rehashes hashes made with an older work factor."""
+        record = self.get(username)
+        if record is None or not verify_password(password, record):
+            return False
+        if self.needs_rehash(record):
+            self.set_password(username, password)
+        return True
+
+    def needs_rehash(self, record):
+        if hasattr(hashlib, "scrypt"):
+            return record["algorithm"] != "scrypt" or record["n"] != self.scrypt_n
+        return record["algorithm"] != "pbkdf2_sha256" or record["iterations"] != self.pbkdf2_iterations
@@ -0,0 +1,120 @@
+"""Refresh latency of the items Listbox: full redraw vs. diff vs. virtual.
+
+Run from the repository root with a display available (or under Xvfb)::
+
+    python benchmarks/bench_listview.py --sizes 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import format_item  # noqa: E402
+from listview import ListView  # noqa: E402
+from shopping_list import ShoppingList  # noqa: E402
+
+
+def make_items(count):
+    categories = ["Groceries", "Utilities", "Entertainment", "Transport", "Health", "Other"]
+    return ShoppingList((f"item-{i}", (i % 97) + 0.99, i % 3 == 0, categories[i % 6]) for i in range(count))
+
+
+def full_redraw(listbox, items):
+    """The pre-ListView refresh path: clear and re-insert every row one by one."""
+    listbox.delete(0, tk.END)
+    for item in items:
+        listbox.insert(tk.END, format_item(item))
+
+
+def timed(root, action, repeat):
+    """Best-of-repeat seconds for action(), including Tk's idle redraw."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        root.update_idletasks()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(root, count, repeat):
+    results = {}
+    for mode in ("full", "diff", "virtual"):
+        items = make_items(count)
+        listbox = tk.Listbox(root, height=10, width=60)
+        scrollbar = tk.Scrollbar(root)
+        view = ListView(listbox, items, format_item, virtual=mode == "virtual", scrollbar=scrollbar)
+        view.refresh()
+        root.update_idletasks()
+        middle = count // 2
+        counter = iter(range(10 ** 9))
+
+        if mode == "full":
+            def insert():
+                items.append(f"new-{next(counter)}", 1.0)
+                full_redraw(listbox, items)
+
+            def delete():
+                items.remove(middle)
+                full_redraw(listbox, items)
+
+            def update():
+                items.purchased.set(middle, not items.purchased[middle])
+                full_redraw(listbox, items)
+        else:
+            def insert():
+                view.row_inserted(items.append(f"new-{next(counter)}", 1.0))
+
+            def delete():
+                items.remove(middle)
+                view.row_deleted(middle)
+
+            def update():
+                items.purchased.set(middle, not items.purchased[middle])
+                view.row_changed(middle)
+
+        results[mode] = {
+            "insert": timed(root, insert, repeat),
+            "delete": timed(root, delete, repeat),
+            "update": timed(root, update, repeat),
+            "scroll": timed(root, lambda: view.yview("moveto", 0.5) if mode == "virtual"
+                            else listbox.yview_moveto(0.5), repeat),
+        }
+        listbox.destroy()
+        scrollbar.destroy()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        sys.exit(f"A display is required (try xvfb-run): {e}")
+    root.withdraw()
+
+    report = {}
+    print(f"{'rows':>8} {'mode':>8} {'insert ms':>10} {'delete ms':>10} {'update ms':>10} {'scroll ms':>10}")
+    for count in args.sizes:
+        report[count] = bench_size(root, count, args.repeat)
+        for mode, timings in report[count].items():
+            print(f"{count:>8} {mode:>8}" + "".join(f" {timings[op] * 1000:>10.3f}"
+                                                    for op in ("insert", "delete", "update", "scroll")))
+    root.destroy()
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
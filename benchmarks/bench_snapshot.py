@@ -0,0 +1,124 @@
+"""Startup time and memory: json.load of users.json vs. the binary snapshot.
+
+For each dataset (USERSxITEMS, with --lists lists per user) a users.json is
+generated with datagen.py and converted with snapshot.py. Every measurement
+runs in a fresh interpreter so peak RSS is not skewed by earlier runs:
+
+- json.load: parse the whole users.json (what a monolithic load costs)
+- json.load+user: the above, then build one user's ShoppingLists
+- snapshot.open: mmap the snapshot and read its index
+- snapshot.open+user: the above, then decode one user (a login)
+- snapshot.all_users: decode every user
+
+Times are the best of --repeat runs; RSS is the peak resident size of the
+child minus that of an idle child with the same imports, in MiB::
+
+    python benchmarks/bench_snapshot.py --dataset 10000x50 --dataset 10x20000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import datagen  # noqa: E402
+import snapshot  # noqa: E402
+
+# Run in a child interpreter: {action} is timed, and the peak RSS in KiB is
+# reported after the last run. VmHWM is used where available because Linux
+# carries ru_maxrss over from the parent across exec.
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from storage import decode_list
+from snapshot import Snapshot
+best = float("inf")
+for _ in range({repeat}):
+    start = time.perf_counter()
+{action}
+    best = min(best, time.perf_counter() - start)
+    for name in ("users", "user", "snap"):
+        globals().pop(name, None)  # So the next run does not hold two copies at its peak
+try:
+    with open("/proc/self/status") as status:
+        rss = next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": best, "rss_kib": rss}}))
+"""
+
+ACTIONS = {
+    "idle": "    pass",
+    "json.load": "    with open({json_path!r}) as file: users = json.load(file)",
+    "json.load+user": (
+        "    with open({json_path!r}) as file: users = json.load(file)\n"
+        "    user = users['user-0']\n"
+        "    for shopping_list in user['shopping_lists'].values(): decode_list(shopping_list)"
+    ),
+    "snapshot.open": "    snap = Snapshot({snapshot_path!r})",
+    "snapshot.open+user": "    snap = Snapshot({snapshot_path!r}); user = snap.load_user('user-0')",
+    "snapshot.all_users": (
+        "    snap = Snapshot({snapshot_path!r})\n"
+        "    users = [snap.load_user(username) for username in snap.usernames()]"
+    ),
+}
+
+
+def measure(action, repeat, **paths):
+    code = CHILD.format(root=ROOT, repeat=repeat, action=action.format(**paths))
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def bench_dataset(users, lists, items, repeat, workdir):
+    json_path = os.path.join(workdir, "users.json")
+    snapshot_path = os.path.join(workdir, "users.snap")
+    datagen.write_dataset(json_path, users, lists, items)
+    snapshot.json_to_snapshot(json_path, snapshot_path)
+    results = {"users_json_bytes": os.path.getsize(json_path), "snapshot_bytes": os.path.getsize(snapshot_path)}
+
+    idle = measure(ACTIONS["idle"], 1)["rss_kib"]
+    for name, action in ACTIONS.items():
+        if name == "idle":
+            continue
+        result = measure(action, repeat, json_path=json_path, snapshot_path=snapshot_path)
+        results[name] = {"seconds": result["seconds"], "rss_mib": (result["rss_kib"] - idle) / 1024}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", action="append", metavar="USERSxITEMS",
+                        help="dataset size, repeatable (default: 10000x50 and 10x20000)")
+    parser.add_argument("--lists", type=int, default=3, help="lists per user")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for dataset in args.dataset or ["10000x50", "10x20000"]:
+        users, items = (int(part) for part in dataset.lower().split("x"))
+        workdir = tempfile.mkdtemp(prefix="planner-snapshot-")
+        try:
+            results = report[dataset] = bench_dataset(users, args.lists, items, args.repeat, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        print(f"{dataset} ({users} users x {args.lists} lists x {items} items)")
+        print(f"  users.json {results['users_json_bytes'] / 2 ** 20:8.1f} MiB   "
+              f"snapshot {results['snapshot_bytes'] / 2 ** 20:8.1f} MiB")
+        for key, value in results.items():
+            if isinstance(value, dict):
+                print(f"  {key:<22} {value['seconds'] * 1000:10.3f} ms  {value['rss_mib']:8.1f} MiB RSS")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
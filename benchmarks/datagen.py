@@ -0,0 +1,64 @@
+"""Generate synthetic users.json datasets for benchmarking.
+
+The output uses the original monolithic users.json layout (which the app
+migrates into per-user shards on first start) and is written one user at a
+time, so even 100k users x large lists never have to fit in memory::
+
+    python benchmarks/datagen.py --users 1000 --lists 3 --items 100 -o users.json
+"""
+import argparse
+import json
+import random
+
+CATEGORIES = ["Groceries", "Utilities", "Entertainment", "Transport", "Health", "Other"]
+
+
+def generate_items(rng, count):
+    """Return count [name, price, purchased, category] items with unique names."""
+    return [
+        [f"item-{index}", round(rng.uniform(0.5, 50), 2), rng.random() < 0.4, rng.choice(CATEGORIES)]
+        for index in range(count)
+    ]
+
+
+def generate_user(rng, lists, items):
+    shopping_lists = {}
+    for index in range(lists):
+        list_items = generate_items(rng, items)
+        shopping_lists[f"list-{index}"] = {
+            "items": list_items,
+            "budget": round(items * rng.uniform(10, 30), 2),
+            "spent": round(sum(item[1] for item in list_items if item[2]), 2),
+            "categories": {},
+        }
+    return {"password": "password", "shopping_lists": shopping_lists}
+
+
+def write_dataset(path, users, lists, items, seed=0):
+    """Write a users.json with users accounts of lists lists of items items each."""
+    rng = random.Random(seed)
+    with open(path, "w") as file:
+        file.write("{")
+        for index in range(users):
+            if index:
+                file.write(", ")
+            file.write(json.dumps(f"user-{index}"))
+            file.write(": ")
+            json.dump(generate_user(rng, lists, items), file)
+        file.write("}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--lists", type=int, default=3, help="lists per user")
+    parser.add_argument("--items", type=int, default=100, help="items per list")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="users.json")
+    args = parser.parse_args(argv)
+    write_dataset(args.output, args.users, args.lists, args.items, args.seed)
+    print(f"Wrote {args.users} users x {args.lists} lists x {args.items} items to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
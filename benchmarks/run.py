@@ -0,0 +1,207 @@
+"""Benchmark harness for the planner's hot paths.
+
+For each dataset (USERSxITEMS: that many users, each with --lists lists of
+that many items) a synthetic users.json is generated with datagen.py, then
+load/migration, per-user load, save, add_item (duplicate check included),
+the items Listbox refresh, export and chart rendering are timed. Each
+timing is the best of --repeat runs, in seconds.
+
+Results are written as JSON. Given --baseline, timings slower than the
+baseline by more than --threshold are reported as regressions and the exit
+status is 1::
+
+    python benchmarks/run.py --dataset 100x100 --dataset 1x20000 -o bench.json
+    python benchmarks/run.py --dataset 100x100 --baseline bench.json
+
+The Listbox refresh needs a display; run under xvfb-run to include it.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datagen  # noqa: E402
+from core import PlannerCore  # noqa: E402
+from storage import UserStore  # noqa: E402
+
+
+def best_of(repeat, action, setup=None):
+    """Best wall-clock time of action() over repeat runs; setup() runs untimed before each."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_listbox(items, repeat):
+    """Time a full items Listbox refresh and a single-row insert, or explain why not."""
+    import tkinter as tk
+
+    from core import format_item
+    from listview import ListView
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"update_items_listbox": {"skipped": f"no display ({e})"}}
+    root.withdraw()
+    try:
+        results = {}
+        for virtual in (False, True):
+            listbox = tk.Listbox(root, height=10)
+            view = ListView(listbox, items, format_item, virtual=virtual, scrollbar=tk.Scrollbar(root))
+            mode = "virtual" if virtual else "diff"
+
+            def refresh():
+                view.refresh()
+                root.update_idletasks()
+
+            def insert_row():
+                view.row_inserted(len(items) - 1)
+                root.update_idletasks()
+
+            results[f"update_items_listbox.{mode}.full"] = best_of(repeat, refresh)
+            results[f"update_items_listbox.{mode}.insert"] = best_of(repeat, insert_row)
+            listbox.destroy()
+        return results
+    finally:
+        root.destroy()
+
+
+def bench_dataset(users, lists, items, repeat, workdir):
+    results = {}
+    legacy_path = os.path.join(workdir, "users.json")
+    datagen.write_dataset(legacy_path, users, lists, items)
+    results["users_json_bytes"] = os.path.getsize(legacy_path)
+
+    store = UserStore(os.path.join(workdir, "data"), legacy_path=legacy_path)
+    core = PlannerCore(store)
+    start = time.perf_counter()
+    core.load_data()  # One-time migration of users.json into shards
+    results["load_data.migrate"] = time.perf_counter() - start
+    results["load_data.startup"] = best_of(repeat, core.load_data)
+
+    results["login.load_user"] = best_of(repeat, lambda: store.load_user("user-0"))
+    start = time.perf_counter()
+    core.login("user-0", "password")  # First login also hashes the legacy password
+    results["login.first"] = time.perf_counter() - start
+    results["login.authenticate"] = best_of(repeat, lambda: core.authenticate("user-0", "password"))
+
+    list_name = "list-0"
+    shopping_list = core.get_list(list_name)
+    counter = iter(range(10 ** 9))
+
+    def add_items():
+        for _ in range(100):
+            core.add_item(list_name, f"new-{next(counter)}", 1.25, "Other")
+
+    results["add_item.x100"] = best_of(repeat, add_items)
+    results["save_data.one_list"] = best_of(repeat, core.save, setup=lambda: core.set_budget(list_name, 100))
+    results["save_data.all_lists"] = best_of(repeat, lambda: store.save_user(core.username, core.user))
+
+    export_path = os.path.join(workdir, "export")
+    results["export_list.txt"] = best_of(repeat, lambda: core.export_list(list_name, export_path + ".txt"))
+    results["export_items.csv"] = best_of(repeat, lambda: core.export_items(list_name, export_path + ".csv"))
+
+    try:
+        from charts import breakdown, render_breakdown
+        import matplotlib  # noqa: F401
+    except ImportError as e:
+        results["show_pie_chart.render"] = {"skipped": str(e)}
+    else:
+        render_breakdown(breakdown(shopping_list["items"]), "warm-up")  # Exclude the one-time import
+        results["show_pie_chart.render"] = best_of(
+            repeat, lambda: render_breakdown(breakdown(shopping_list["items"]), list_name)
+        )
+
+    results.update(bench_listbox(shopping_list["items"], repeat))
+    core.logout()
+    return results
+
+
+def compare(current, baseline, threshold, min_delta):
+    """Return (key, baseline, current) for every timing that regressed."""
+    regressions = []
+    for dataset, timings in current.items():
+        for key, seconds in timings.items():
+            base = baseline.get(dataset, {}).get(key)
+            if not isinstance(seconds, float) or not isinstance(base, float):
+                continue
+            if seconds > base * (1 + threshold) and seconds - base > min_delta:
+                regressions.append((f"{dataset} {key}", base, seconds))
+    return regressions
+
+
+def parse_dataset(text):
+    users, items = text.lower().split("x")
+    return int(users), int(items)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", action="append", metavar="USERSxITEMS",
+                        help="dataset size, repeatable (default: 100x100 and 1x10000)")
+    parser.add_argument("--lists", type=int, default=3, help="lists per user")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (default 0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.002, help="ignore slowdowns below this many seconds")
+    args = parser.parse_args(argv)
+
+    datasets = args.dataset or ["100x100", "1x10000"]
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "lists_per_user": args.lists,
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    for dataset in datasets:
+        users, items = parse_dataset(dataset)
+        workdir = tempfile.mkdtemp(prefix="planner-bench-")
+        try:
+            results = bench_dataset(users, args.lists, items, args.repeat, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        report["results"][dataset] = results
+        print(f"{dataset} ({users} users x {args.lists} lists x {items} items)")
+        for key, value in results.items():
+            if isinstance(value, float):
+                print(f"  {key:<40} {value * 1000:10.3f} ms")
+            elif isinstance(value, dict):
+                print(f"  {key:<40} skipped: {value['skipped']}")
+            else:
+                print(f"  {key:<40} {value}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(report["results"], baseline, args.threshold, args.min_delta)
+        for key, base, seconds in regressions:
+            print(f"REGRESSION {key}: {base * 1000:.3f} ms -> {seconds * 1000:.3f} ms")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Streaming CSV and JSON-lines import and export for shopping list items.
+
+Readers are generators that yield one raw (name, price, purchased, category)
+row at a time, and writers consume any iterable of item tuples, so neither
+side ever holds a whole file in memory. PlannerCore.import_items and
+PlannerCore.export_items build on these.
+"""
+import csv
+import json
+import os
+from collections import namedtuple
+
+FIELDS = ["name", "price", "purchased", "category"]
+FORMATS = ("csv", "jsonl")
+
+TRUE_VALUES = {"1", "true", "yes", "y", "purchased"}
+
+
+class TransferStats(namedtuple("TransferStats", "rows skipped rejected seconds")):
+    """Outcome of an import or export: rows written, rows skipped as duplicates,
+    rows rejected as invalid, and elapsed seconds."""
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+    def __str__(self):
+        text = f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+        if self.skipped:
+            text += f", {self.skipped} duplicates skipped"
+        if self.rejected:
+            text += f", {self.rejected} invalid rows rejected"
+        return text
+
+
+def detect_format(path):
+    """Return "csv" or "jsonl" from a file name's extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "ndjson":
+        return "jsonl"
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file type: {path} (expected .csv or .jsonl)")
+    return extension
+
+
+def parse_purchased(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def iter_csv_rows(file):
+    """Yield (name, price, purchased, category) from a CSV file with a header row."""
+    for record in csv.DictReader(file):
+        yield (record.get("name"), record.get("price"),
+               parse_purchased(record.get("purchased", "")), record.get("category") or "Other")
+
+
+def iter_jsonl_rows(file):
+    """Yield (name, price, purchased, category) from JSON lines.
+
+    Each line is either an object with the FIELDS keys or a
+    [name, price, purchased, category] array as used in the data files.
+    Raises ValueError for a line that is neither.
+    """
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if isinstance(record, list):
+            record = dict(zip(FIELDS, record))
+        elif not isinstance(record, dict):
+            raise ValueError(f"line {line_number}: expected an object or an array, got {type(record).__name__}")
+        yield (record.get("name"), record.get("price"),
+               parse_purchased(record.get("purchased", False)), record.get("category") or "Other")
+
+
+def iter_rows(file, fmt):
+    return iter_csv_rows(file) if fmt == "csv" else iter_jsonl_rows(file)
+
+
+def write_rows(file, items, fmt):
+    """Write item tuples to an open file one row at a time. Returns the row count."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for count, item in enumerate(items, 1):
+            writer.writerow(item)
+    else:
+        for count, item in enumerate(items, 1):
+            file.write(json.dumps(dict(zip(FIELDS, item))) + "\n")
+    return count
+
+
+def open_for_format(path, mode, fmt):
+    # The csv module needs newline="" to handle quoted newlines itself
+    return open(path, mode, newline="" if fmt == "csv" else None, encoding="utf-8")
@@ -0,0 +1,106 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def breakdown(shopping_list):
+    """Snapshot the totals a chart needs, so rendering never touches the live list."""
+    return {
+        "spent": shopping_list.spent,
+        "pending": shopping_list.pending,
+        "categories": shopping_list.category_totals(),
+    }
+
+
+def render_breakdown(data, title):
+    """Render a spending breakdown to PNG bytes with the Agg backend.
+
+    The left panel is the purchased vs. not purchased pie, the right panel
+    breaks both down per category. Uses a bare Figure rather than pyplot, so
+    nothing is registered globally and the figure is freed when cleared.
+
+    matplotlib is imported here rather than at module level, so its import
+    cost is paid on the chart worker thread the first time a chart is opened.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 4), dpi=100)
+    FigureCanvasAgg(fig)
+    try:
+        fig.suptitle(title)
+        status_ax, category_ax = fig.subplots(1, 2)
+
+        if data["spent"] or data["pending"]:
+            status_ax.pie([data["spent"], data["pending"]], labels=["Purchased", "Not Purchased"],
+                          autopct="%1.1f%%", startangle=90)
+            status_ax.axis("equal")  # Equal aspect ratio ensures the pie chart is circular.
+        else:
+            status_ax.text(0.5, 0.5, "No items", ha="center", va="center")
+            status_ax.axis("off")
+
+        categories = sorted(data["categories"].items(), key=lambda entry: sum(entry[1]), reverse=True)
+        names = [name for name, _ in categories]
+        spent = [totals[0] for _, totals in categories]
+        pending = [totals[1] for _, totals in categories]
+        category_ax.set_title("By category")
+        if names:
+            category_ax.barh(names, spent, label="Purchased")
+            category_ax.barh(names, pending, left=spent, label="Not Purchased")
+            category_ax.invert_yaxis()  # Largest category on top
+            category_ax.set_xlabel("$")
+            category_ax.legend(loc="lower right")
+        else:
+            category_ax.axis("off")
+
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.canvas.print_png(buffer)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+class ChartRenderer:
+    """Renders spending charts on a worker thread and caches the PNGs.
+
+    Entries are keyed by the caller's key plus the list's version, so a list
+    that has not changed reuses its image. At most max_entries images are
+    kept, evicting the least recently used.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart")
+
+    def request(self, key, shopping_list, title):
+        """Return a Future resolving to the PNG bytes for the list's current state.
+
+        Must be called from the thread that owns shopping_list (the Tk thread).
+        """
+        cache_key = (key, shopping_list.version)
+        with self._lock:
+            png = self._cache.get(cache_key)
+            if png is not None:
+                self._cache.move_to_end(cache_key)
+        if png is not None:
+            future = Future()
+            future.set_result(png)
+            return future
+        data = breakdown(shopping_list)
+        return self._executor.submit(self._render, cache_key, data, title)
+
+    def _render(self, cache_key, data, title):
+        png = render_breakdown(data, title)
+        with self._lock:
+            self._cache[cache_key] = png
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return png
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,241 @@
+"""Command-line interface to the planner, built on the headless core.
+
+Examples::
+
+    python cli.py --user alice signup
+    python cli.py --user alice create-list Weekly --budget 120
+    python cli.py --user alice add Weekly Apples 4.50 --category Groceries
+    python cli.py --user alice show Weekly
+    python cli.py --user alice export Weekly weekly.json --format json
+    python cli.py --user alice import weekly.json --list "Weekly copy"
+    python cli.py --user alice import pantry.csv --list Pantry
+    python cli.py --user alice export Pantry pantry.jsonl --format jsonl
+    python cli.py --user alice bulk edits.jsonl
+    python cli.py --user alice --sync http://127.0.0.1:8765 --household home sync
+
+The password is read from --password, the PLANNER_PASSWORD environment
+variable, or prompted for.
+
+A bulk file holds one JSON object per line, each with an "op" of
+create_list, delete_list, add_item, remove_item, purchase_item or
+set_budget plus the fields that operation needs ("list", "name", "price",
+"category", "budget").
+"""
+import argparse
+import getpass
+import json
+import os
+import sys
+
+from core import CATEGORIES, PlannerCore, PlannerError, format_item
+from storage import UserStore
+
+
+def apply_bulk_op(core, op):
+    """Apply one bulk-edit operation to the logged-in user's lists."""
+    if not isinstance(op, dict):
+        raise PlannerError(f"Expected a JSON object, got {type(op).__name__}")
+    kind = op.get("op")
+    list_name = op.get("list")
+    if kind == "create_list":
+        core.create_list(list_name, op.get("budget", 0))
+    elif kind == "delete_list":
+        core.delete_list(list_name)
+    elif kind == "add_item":
+        row = core.add_item(list_name, op.get("name"), op.get("price"), op.get("category", CATEGORIES[0]))
+        if op.get("purchased"):
+            core.purchase_item(list_name, row)
+    elif kind == "remove_item":
+        core.remove_item(list_name, core.find_item(list_name, op.get("name")))
+    elif kind == "purchase_item":
+        core.purchase_item(list_name, core.find_item(list_name, op.get("name")))
+    elif kind == "set_budget":
+        core.set_budget(list_name, float(op["budget"]))
+    else:
+        raise PlannerError(f"Unknown operation: {kind!r}")
+
+
+def run_bulk(core, lines):
+    """Apply every operation in lines; report rejected ones and keep going. Returns (applied, failed)."""
+    applied = failed = 0
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            apply_bulk_op(core, json.loads(line))
+            applied += 1
+        except (PlannerError, ValueError, KeyError, TypeError) as e:
+            failed += 1
+            print(f"line {line_number}: {e}", file=sys.stderr)
+    return applied, failed
+
+
+def show_list(core, list_name):
+    summary = core.budget_summary(list_name)
+    print(f"Shopping List: {list_name}")
+    print(f"Budget: ${summary['budget']:.2f}  Spent: ${summary['spent']:.2f}  Remaining: ${summary['remaining']:.2f}")
+    if summary["exceeded"]:
+        print(f"Budget Exceeded by: ${summary['exceeded']:.2f}")
+    for item in core.get_list(list_name)["items"]:
+        print(format_item(item))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Smart Household Planner command-line interface.")
+    parser.add_argument("--data", default="data", help="data directory (default: data)")
+    parser.add_argument("--user", required=True, help="username")
+    parser.add_argument("--password", help="password (default: $PLANNER_PASSWORD or prompt)")
+    parser.add_argument("--sync", metavar="URL", default=os.environ.get("PLANNER_SYNC_URL"),
+                        help="household sync server (default: $PLANNER_SYNC_URL; no sync if unset)")
+    parser.add_argument("--household", default=os.environ.get("PLANNER_HOUSEHOLD"),
+                        help="shared sync space (default: $PLANNER_HOUSEHOLD, or the username)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("signup", help="create the user")
+    commands.add_parser("lists", help="list the user's shopping lists")
+
+    command = commands.add_parser("show", help="print a list with its budget")
+    command.add_argument("list")
+
+    command = commands.add_parser("create-list", help="create a shopping list")
+    command.add_argument("list")
+    command.add_argument("--budget", type=float, default=0)
+
+    command = commands.add_parser("delete-list", help="delete a shopping list")
+    command.add_argument("list")
+
+    command = commands.add_parser("add", help="add an item")
+    command.add_argument("list")
+    command.add_argument("name")
+    command.add_argument("price")
+    command.add_argument("--category", default=CATEGORIES[0], choices=CATEGORIES)
+
+    command = commands.add_parser("remove", help="remove an item")
+    command.add_argument("list")
+    command.add_argument("name")
+
+    command = commands.add_parser("purchase", help="mark an item as purchased")
+    command.add_argument("list")
+    command.add_argument("name")
+
+    command = commands.add_parser("budget", help="set a list's budget")
+    command.add_argument("list")
+    command.add_argument("amount", type=float)
+
+    command = commands.add_parser("export", help="export a list to a file")
+    command.add_argument("list")
+    command.add_argument("path")
+    command.add_argument("--format", choices=["txt", "json", "csv", "jsonl"], default="txt")
+
+    command = commands.add_parser("import", help="import a JSON list export, or items from CSV/JSON lines")
+    command.add_argument("path")
+    command.add_argument("--list", help="target list (default: the name stored in a JSON export, "
+                                        "or the file name for CSV/JSON lines)")
+    command.add_argument("--batch-size", type=int, default=5000, help="items inserted per batch")
+
+    command = commands.add_parser("analytics", help="spending report across lists")
+    command.add_argument("--all-users", action="store_true", help="include every user's lists")
+    command.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    commands.add_parser("sync", help="exchange changes with the household sync server")
+
+    command = commands.add_parser("bulk", help="apply JSON-lines edits from a file ('-' for stdin)")
+    command.add_argument("path")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    password = args.password or os.environ.get("PLANNER_PASSWORD") or getpass.getpass()
+
+    sync_transport = None
+    if args.sync:
+        from sync import HTTPTransport
+
+        sync_transport = HTTPTransport(args.sync)
+    core = PlannerCore(UserStore(args.data), sync_transport=sync_transport, household=args.household)
+    core.load_data()
+    try:
+        if args.command == "signup":
+            core.signup(args.user, password)
+            print(f"Created user {args.user}.")
+        else:
+            core.login(args.user, password)
+        status = run_command(core, args)
+    except PlannerError as e:
+        print(f"{e.title}: {e}", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as e:  # Missing or unwritable files, malformed JSON
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        core.logout()
+    return status
+
+
+def run_command(core, args):
+    """Run one subcommand for the logged-in user. Returns the exit status."""
+    if args.command == "lists":
+        for list_name in core.list_names():
+            print(list_name)
+    elif args.command == "show":
+        show_list(core, args.list)
+    elif args.command == "create-list":
+        core.create_list(args.list, args.budget)
+    elif args.command == "delete-list":
+        core.delete_list(args.list)
+    elif args.command == "add":
+        core.add_item(args.list, args.name, args.price, args.category)
+    elif args.command == "remove":
+        core.remove_item(args.list, core.find_item(args.list, args.name))
+    elif args.command == "purchase":
+        core.purchase_item(args.list, core.find_item(args.list, args.name))
+    elif args.command == "budget":
+        core.set_budget(args.list, args.amount)
+    elif args.command == "export":
+        if args.format == "json":
+            core.export_json(args.list, args.path)
+        elif args.format in ("csv", "jsonl"):
+            print(f"Exported {core.export_items(args.list, args.path, args.format)}")
+        else:
+            core.export_list(args.list, args.path)
+        print(f"Shopping list exported to {args.path}")
+    elif args.command == "import":
+        if args.path.lower().endswith(".json"):
+            list_name = core.import_json(args.path, args.list)
+            print(f"Imported into {list_name}.")
+        else:
+            list_name = args.list or os.path.splitext(os.path.basename(args.path))[0]
+            stats = core.import_items(list_name, args.path, batch_size=args.batch_size)
+            print(f"Imported {stats} into {list_name}.")
+    elif args.command == "analytics":
+        report = core.analytics_report(all_users=args.all_users)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            from analytics import format_report
+
+            print(format_report(report))
+    elif args.command == "sync":
+        if core.sync is None:
+            raise PlannerError("Sync is not configured; pass --sync URL or set PLANNER_SYNC_URL.")
+        from sync import SyncError
+
+        try:
+            print(f"Applied {core.sync_now()} changes from the household.")
+        except SyncError as e:
+            raise PlannerError(f"Sync failed: {e}") from None
+    elif args.command == "bulk":
+        if args.path == "-":
+            applied, failed = run_bulk(core, sys.stdin)
+        else:
+            with open(args.path, "r") as file:
+                applied, failed = run_bulk(core, file)
+        print(f"Applied {applied} operations, {failed} rejected.")
+        if failed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
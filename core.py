@@ -0,0 +1,570 @@
+import csv
+import hmac
+import json
+import math
+import time
+from collections import namedtuple
+
+from auth import CredentialStore
+from bulkio import TransferStats, detect_format, iter_rows, open_for_format, write_rows
+from search import SearchIndex
+from shopping_list import ShoppingList
+from storage import UserStore
+from wal import WriteAheadLog, apply_record, replay
+
+# Predefined categories
+CATEGORIES = ["Groceries", "Utilities", "Entertainment", "Transport", "Health", "Other"]
+
+
+class PlannerError(Exception):
+    """An operation was rejected. The message is meant to be shown to the user."""
+
+    title = "Error"
+
+
+class DuplicateError(PlannerError):
+    title = "Duplicate"
+
+
+class MissingInputError(PlannerError):
+    title = "Missing Input"
+
+
+class InvalidInputError(PlannerError):
+    title = "Invalid Input"
+
+
+class LoginError(PlannerError):
+    title = "Login Failed"
+
+
+class SignupError(PlannerError):
+    title = "Signup Failed"
+
+
+def format_item(item):
+    """Format an item tuple as one line of the items Listbox or an export."""
+    status = "Purchased" if item[2] else "Not Purchased"
+    return f"{item[0]} - ${item[1]:.2f} - {status} - Category: {item[3]}"
+
+
+# A change to one of the user's lists, passed to subscribe() callbacks. kind
+# is "list_added", "list_deleted", "budget", "items" (a batch of items was
+# added) or, for a single item, "insert", "delete" or "change" with its row.
+ListChange = namedtuple("ListChange", "list_name kind row")
+
+
+def check_text(value, what):
+    """Raise InvalidInputError unless value is non-empty text."""
+    if not isinstance(value, str) or not value:
+        raise InvalidInputError(f"The {what} must be non-empty text.")
+
+
+def check_budget(budget):
+    """Raise InvalidInputError unless budget is a finite number."""
+    if isinstance(budget, bool) or not isinstance(budget, (int, float)) or not math.isfinite(budget):
+        raise InvalidInputError("The budget must be a number.")
+
+
+def new_list(budget=0):
+    return {"items": ShoppingList(), "budget": budget, "spent": 0, "categories": {}}
+
+
+class PlannerCore:
+    """UI-free service API for users, shopping lists, items and budgets.
+
+    One PlannerCore serves one logged-in user at a time. Every mutation is
+    recorded in the user's write-ahead log and saved with save(). Methods
+    raise PlannerError subclasses for input the user should correct; the
+    Tk app and the CLI only decide how to present those errors.
+
+    Every change to a list is also published as a ListChange to the
+    callbacks registered with subscribe(), so several windows showing the
+    same list stay in sync.
+
+    With a sync_transport (a sync.HTTPTransport or an in-process
+    sync.SyncServer) changes are also replicated to a household space, named
+    household or, by default, after the user. Login pulls the lists changed
+    since the last sync; sync_now() or apply_sync() bring in later changes.
+    """
+
+    def __init__(self, store=None, credentials=None, sync_transport=None, household=None):
+        self.store = store or UserStore()
+        self.credentials = credentials or CredentialStore(self.store.credentials_path)
+        self.sync_transport = sync_transport
+        self.household = household
+        self.sync = None  # sync.SyncClient for the logged-in user, if syncing
+        self.username = None
+        self.user = None
+        self.dirty_lists = set()  # Lists changed since the last save
+        self.wal = None  # Write-ahead log for the logged-in user's changes
+        self._search = None  # SearchIndex over the user's items, built on first search
+        self._analytics = None  # analytics.SpendingAnalytics, created on first report
+        self._subscribers = {}  # list name (None for every list) -> callbacks
+
+    # Data files
+
+    def load_data(self):
+        """Migrate a legacy users.json into per-user shards and replay change logs.
+
+        User data itself is loaded lazily, one user at a time, on login.
+        """
+        try:
+            moved = self.store.migrate_layout()
+            if moved:
+                print(f"Renamed the data files of {moved} users.")
+            migrated = self.store.migrate_legacy()
+            if migrated:
+                print(f"Migrated {migrated} users to per-user storage.")
+            usernames = self.store.usernames()
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return
+        for username in usernames:
+            try:
+                self._replay_log(username)
+            except Exception as e:
+                print(f"Error recovering unsaved changes for {username}: {e}")  # Retried on their login
+
+    def _replay_log(self, username):
+        replayed = replay(self.store, username, self.store.wal_path(username))
+        if replayed:
+            print(f"Recovered {replayed} unsaved changes for {username}.")
+
+    def save(self):
+        """Save the logged-in user's changed lists to their shard."""
+        if self.username is None:
+            return
+        self.wal.checkpoint(lambda: self.store.save_user(self.username, self.user, self.dirty_lists))
+        self.dirty_lists = set()
+        if self.sync is not None:
+            self.sync.save_state()
+
+    # Users
+
+    @property
+    def shopping_lists(self):
+        return self.user["shopping_lists"] if self.user is not None else {}
+
+    def user_exists(self, username):
+        return username in self.credentials or self.store.user_exists(username)
+
+    def authenticate(self, username, password):
+        """Check a password against the credential index without loading any list data.
+
+        Accounts from before the credential index still hold a plaintext
+        password in their shard; on their first successful login the password
+        is hashed into the index and removed from the shard.
+        """
+        if not username:
+            return False
+        if username in self.credentials:
+            return self.credentials.verify(username, password)
+        if not self.store.user_exists(username):
+            return False
+        account = self.store.load_account(username)
+        stored = account.get("password")
+        if stored is None or not hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8")):
+            return False
+        self.credentials.set_password(username, password)
+        del account["password"]
+        self.store.write_account(username, account)
+        return True
+
+    def login(self, username, password):
+        """Authenticate and load the user's lists. Slow by design (password hashing)."""
+        if not self.authenticate(username, password):
+            raise LoginError("Invalid username or password.")
+        # A log that could not be replayed at startup must be folded in before
+        # the session's first checkpoint deletes it
+        self._replay_log(username)
+        self._start_session(username, self.store.load_user(username))
+        self._first_sync()
+
+    def signup(self, username, password):
+        if self.user_exists(username):
+            raise SignupError("Username already exists.")
+        if not (username and password):
+            raise SignupError("Please enter a username and password.")
+        self.credentials.set_password(username, password)
+        self._start_session(username, self.store.create_user(username))
+        self._first_sync()
+
+    def logout(self, save=True, push=True):
+        """Save (unless the caller already has), then close the session.
+
+        With push=False unsent sync deltas are only saved in the outbox, so
+        logging out never waits on the network; the caller may push them
+        later with the SyncClient (the Tk app does so on its worker thread).
+        """
+        if self.username is None:
+            return
+        if self.sync is not None:
+            if push:
+                try:
+                    self.sync.push()
+                except Exception as e:
+                    print(f"Error syncing: {e}")  # Kept in the outbox for next time
+            self.sync.save_state()
+            self.sync = None
+        if save:
+            self.save()
+        self.wal.close()
+        self.wal = None
+        self.username = None
+        self.user = None
+        self._search = None
+        self._analytics = None
+
+    def _start_session(self, username, user):
+        if self.username is not None:
+            self.logout()
+        self.username = username
+        self.user = user
+        self.dirty_lists = set()
+        self._search = None
+        self.wal = WriteAheadLog(self.store, username)
+        if self.sync_transport is not None:
+            from sync import SyncClient
+
+            self.sync = SyncClient(self.sync_transport, self.household or username, self.store.sync_path(username))
+
+    def log_change(self, op, list_name, **fields):
+        """Record a list mutation in the write-ahead log."""
+        record = {"op": op, "list": list_name, **fields}
+        self.dirty_lists.add(list_name)
+        self.wal.append(record)
+        if self.sync is not None:
+            self.sync.record(record, self.shopping_lists)
+
+    # Sync
+
+    def _first_sync(self):
+        """Pull what changed since the last sync; the first time, queue every local list for upload."""
+        if self.sync is None:
+            return
+        if self.sync.is_new:
+            self.sync.seed(self.shopping_lists)
+        try:
+            self.sync_now()
+        except Exception as e:
+            print(f"Error syncing: {e}")
+
+    def sync_now(self):
+        """Push local changes and apply the household's. Returns the number of changes applied."""
+        return self.apply_sync(self.sync.exchange())
+
+    def apply_sync(self, changes):
+        """Apply changes pulled with SyncClient.exchange(), which may have run on another thread.
+
+        They are logged and published like local edits but not sent back to
+        the server. Returns the number of changes applied.
+        """
+        records = self.sync.resolve(changes, self.shopping_lists)
+        kinds = {"add_list": "list_added", "delete_list": "list_deleted", "set_budget": "budget"}
+        for record in records:
+            apply_record(self.shopping_lists, record)
+            self.wal.append(record)
+            if record["op"] == "delete_list":
+                self.dirty_lists.discard(record["list"])
+            else:
+                self.dirty_lists.add(record["list"])
+            self.publish(record["list"], kinds.get(record["op"], "items"))
+        if records:
+            self._search = None  # Rebuilt on the next search
+        return len(records)
+
+    # Change events
+
+    def subscribe(self, callback, list_name=None):
+        """Call callback(change) with a ListChange after every change to list_name, or to any list."""
+        self._subscribers.setdefault(list_name, []).append(callback)
+
+    def unsubscribe(self, callback, list_name=None):
+        callbacks = self._subscribers.get(list_name, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+            if not callbacks:
+                del self._subscribers[list_name]
+
+    def publish(self, list_name, kind, row=None):
+        change = ListChange(list_name, kind, row)
+        for key in (list_name, None):
+            for callback in list(self._subscribers.get(key, ())):
+                callback(change)
+
+    # Lists
+
+    def list_names(self):
+        return list(self.shopping_lists)
+
+    def get_list(self, list_name):
+        try:
+            return self.shopping_lists[list_name]
+        except KeyError:
+            raise PlannerError(f"No list named '{list_name}'.") from None
+
+    def create_list(self, list_name, budget=0):
+        if not list_name:
+            raise MissingInputError("Please enter a name for the list!")
+        check_text(list_name, "list name")
+        check_budget(budget)
+        if list_name in self.shopping_lists:
+            raise DuplicateError("A list with this name already exists!")
+        self.shopping_lists[list_name] = new_list(budget)
+        self.log_change("add_list", list_name)
+        if budget:
+            self.log_change("set_budget", list_name, budget=budget)
+        self.publish(list_name, "list_added")
+
+    def delete_list(self, list_name):
+        self.get_list(list_name)
+        del self.shopping_lists[list_name]
+        self.dirty_lists.discard(list_name)
+        record = {"op": "delete_list", "list": list_name}
+        self.wal.append(record)
+        if self.sync is not None:
+            self.sync.record(record, self.shopping_lists)
+        if self._search is not None:
+            self._search.remove_list(list_name)
+        self.publish(list_name, "list_deleted")
+
+    # Items
+
+    def find_item(self, list_name, item_name):
+        """Return the row of an item by name."""
+        items = self.get_list(list_name)["items"]
+        if item_name not in items:
+            raise PlannerError(f"No item named '{item_name}' in '{list_name}'.")
+        return items.index(item_name)
+
+    def add_item(self, list_name, item_name, item_price, item_category=CATEGORIES[0]):
+        """Add an item; item_price may be a number or the text typed by the user. Returns its row."""
+        if not (item_name and item_price not in ("", None)):
+            raise MissingInputError("Please enter both item name and price!")
+        check_text(item_name, "item name")
+        check_text(item_category, "category")
+        try:
+            item_price = float(item_price)
+        except (TypeError, ValueError):
+            raise InvalidInputError("Please enter a valid price!") from None
+        if not math.isfinite(item_price):
+            raise InvalidInputError("Please enter a valid price!")
+        items = self.get_list(list_name)["items"]
+        if item_name in items:
+            raise DuplicateError("This item already exists in the list!")
+        row = items.append(item_name, item_price, False, item_category)
+        self.log_change("add_item", list_name, item=(item_name, item_price, False, item_category))
+        if self._search is not None:
+            self._search.add(list_name, item_name, False, item_category)
+        self.publish(list_name, "insert", row)
+        return row
+
+    def remove_item(self, list_name, row):
+        """Remove the item at row and return it."""
+        item = self.get_list(list_name)["items"].remove(row)
+        self.log_change("remove_item", list_name, name=item[0])
+        if self._search is not None:
+            self._search.remove(list_name, item[0])
+        self.publish(list_name, "delete", row)
+        return item
+
+    def purchase_item(self, list_name, row):
+        """Mark the item at row as purchased. Returns False if it already was."""
+        items = self.get_list(list_name)["items"]
+        if not items.mark_purchased(row):
+            return False
+        self.log_change("purchase_item", list_name, name=items.names[row])
+        if self._search is not None:
+            self._search.mark_purchased(list_name, items.names[row])
+        self.publish(list_name, "change", row)
+        return True
+
+    # Search
+
+    def search_items(self, text="", category=None, purchased=None, limit=100):
+        """Search all of the user's lists. Returns (list_name, item) pairs, item being the tuple.
+
+        The index is built on the first search and then kept up to date by
+        every mutation, so later searches never scan the lists.
+        """
+        if self._search is None:
+            self._search = SearchIndex.build(self.shopping_lists)
+        results = []
+        for list_name, item_name in self._search.search(text, category, purchased, limit):
+            items = self.shopping_lists[list_name]["items"]
+            results.append((list_name, items[items.index(item_name)]))
+        return results
+
+    # Analytics
+
+    def _spending_analytics(self):
+        if self._analytics is None:
+            from analytics import SpendingAnalytics
+
+            self._analytics = SpendingAnalytics()
+        return self._analytics
+
+    def analytics_report(self, all_users=False, stored=None):
+        """Spending report over the user's lists, or every user's with all_users.
+
+        Per-list results are cached until the list changes. NumPy is imported
+        on the first call only. stored is the result of stored_analytics(),
+        if the caller computed it beforehand.
+        """
+        analytics = self._spending_analytics()
+        if all_users:
+            return analytics.report_all_users(self.store, {self.username: self.shopping_lists}, stored)
+        return analytics.report(self.shopping_lists)
+
+    def stored_analytics(self):
+        """Per-list stats of every other user's saved lists, for analytics_report(all_users=True).
+
+        This reads only files, never the logged-in user's lists, so it can run
+        on a worker thread.
+        """
+        return self._spending_analytics().stored_stats_by_list(self.store, skip={self.username})
+
+    # Budgets
+
+    def set_budget(self, list_name, budget):
+        check_budget(budget)
+        self.get_list(list_name)["budget"] = budget
+        self.log_change("set_budget", list_name, budget=budget)
+        self.publish(list_name, "budget")
+
+    def budget_summary(self, list_name):
+        """Return budget, spent, remaining and exceeded (the amount over budget, or 0)."""
+        shopping_list = self.get_list(list_name)
+        spent = shopping_list["items"].spent
+        remaining = shopping_list["budget"] - spent
+        return {
+            "budget": shopping_list["budget"],
+            "spent": spent,
+            "remaining": remaining,
+            "exceeded": max(0.0, -remaining),
+        }
+
+    # Import and export
+
+    def export_list(self, list_name, file_path):
+        """Export the shopping list to a text file."""
+        summary = self.budget_summary(list_name)
+        with open(file_path, "w") as file:
+            file.write(f"Shopping List: {list_name}\n")
+            file.write(f"Budget: ${summary['budget']:.2f}\n")
+            file.write(f"Spent: ${summary['spent']:.2f}\n")
+            file.write(f"Remaining: ${summary['remaining']:.2f}\n\n")
+            file.write("Items:\n")
+            for item in self.get_list(list_name)["items"]:
+                file.write(format_item(item) + "\n")
+
+    def export_items(self, list_name, file_path, fmt=None):
+        """Stream a list's items to a CSV or JSON-lines file. Returns TransferStats."""
+        fmt = fmt or detect_format(file_path)
+        start = time.perf_counter()
+        with open_for_format(file_path, "w", fmt) as file:
+            rows = write_rows(file, self.get_list(list_name)["items"], fmt)
+        return TransferStats(rows, 0, 0, time.perf_counter() - start)
+
+    def import_items(self, list_name, file_path, fmt=None, batch_size=5000):
+        """Stream items from a CSV or JSON-lines file into a list. Returns TransferStats.
+
+        Rows are read one at a time and inserted batch_size at a time, with one
+        log record and one totals update per batch. Duplicates are skipped and
+        rows without a text name and category or a valid price are rejected.
+        The list is created if it does not exist yet. If the file turns out to
+        be unreadable part way through, the batches already inserted stay and
+        the error says how many rows they held.
+        """
+        try:
+            fmt = fmt or detect_format(file_path)
+        except ValueError as e:
+            raise InvalidInputError(str(e)) from None
+        if list_name not in self.shopping_lists:
+            self.create_list(list_name)
+        items = self.get_list(list_name)["items"]
+        start = time.perf_counter()
+        added = skipped = rejected = 0
+        batch = []
+
+        def commit():
+            # Only the rows actually inserted are logged, indexed and synced;
+            # a duplicate must not overwrite the existing item on another replica
+            names = set()
+            inserted = []
+            for item in batch:
+                if item[0] not in items and item[0] not in names:
+                    names.add(item[0])
+                    inserted.append(item)
+            if inserted:
+                items.extend(inserted)
+                self.log_change("add_items", list_name, items=inserted)
+                if self._search is not None:
+                    for name, _price, purchased, category in inserted:
+                        self._search.add(list_name, name, purchased, category)
+                self.publish(list_name, "items")
+            return len(inserted), len(batch) - len(inserted)
+
+        try:
+            with open_for_format(file_path, "r", fmt) as file:
+                for name, price, purchased, category in iter_rows(file, fmt):
+                    try:
+                        price = float(price)
+                    except (TypeError, ValueError):
+                        price = None
+                    if price is not None and not math.isfinite(price):
+                        price = None  # nan and inf would poison the running totals
+                    if not (name and isinstance(name, str) and isinstance(category, str)) or price is None:
+                        rejected += 1
+                        continue
+                    batch.append((name, price, purchased, category))
+                    if len(batch) >= batch_size:
+                        count, duplicates = commit()
+                        added, skipped = added + count, skipped + duplicates
+                        batch = []
+        except (OSError, ValueError, csv.Error) as e:
+            message = f"Could not read {file_path}: {e}"
+            if added:
+                message += f" ({added} items before the error were imported)"
+            raise InvalidInputError(message) from None
+        if batch:
+            count, duplicates = commit()
+            added, skipped = added + count, skipped + duplicates
+        return TransferStats(added, skipped, rejected, time.perf_counter() - start)
+
+    def export_json(self, list_name, file_path):
+        """Export a list as JSON in the same shape as the data files."""
+        shopping_list = self.get_list(list_name)
+        with open(file_path, "w") as file:
+            json.dump({"name": list_name, "budget": shopping_list["budget"],
+                       "items": shopping_list["items"].to_json()}, file, indent=2)
+
+    def import_json(self, file_path, list_name=None):
+        """Import a list exported with export_json. Returns the name of the list.
+
+        Items whose name already exists in the target list are skipped. The
+        list is created if it does not exist yet.
+        """
+        with open(file_path, "r") as file:
+            data = json.load(file)
+        if not isinstance(data, dict) or not isinstance(data.get("items", []), list):
+            raise InvalidInputError(f"{file_path} is not a list exported as JSON.")
+        list_name = list_name or data.get("name")
+        check_text(list_name, "list name")
+        if "budget" in data:
+            check_budget(data["budget"])
+        if list_name not in self.shopping_lists:
+            self.create_list(list_name)
+        if "budget" in data:
+            self.set_budget(list_name, data["budget"])
+        for item in data.get("items", []):
+            if not isinstance(item, list) or len(item) != 4:
+                raise InvalidInputError(f"Invalid item in {file_path}: {item!r}")
+            name, price, purchased, category = item
+            check_text(name, "item name")
+            if name not in self.get_list(list_name)["items"]:
+                row = self.add_item(list_name, name, price, category)
+                if purchased:
+                    self.purchase_item(list_name, row)
+        return list_name
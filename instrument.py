@@ -0,0 +1,181 @@
+"""Opt-in timing of Tk callbacks and persistence methods.
+
+``python planner.py --instrument`` times every Tk callback (button
+commands, key and mouse bindings, after/after_idle callbacks) and the
+save/load paths, warns on stderr whenever a callback blocks the main loop
+for longer than a frame (16 ms), and prints p50/p99 latency per handler on
+exit. ``--profile`` additionally runs cProfile on the Tk thread. Press
+Ctrl+F12 to write the numbers (and the profile) to disk at any time.
+
+Nothing here is imported unless instrumentation is asked for.
+"""
+import cProfile
+import functools
+import json
+import sys
+import threading
+import time
+import tkinter
+from collections import deque
+
+SLOW_FRAME = 0.016  # Seconds; longer callbacks drop a frame at 60 Hz
+
+
+def callback_name(func):
+    """Readable name for a callback: Class.method, or function:line for lambdas."""
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "callit" and "func" in code.co_freevars:
+        func = func.__closure__[code.co_freevars.index("func")].cell_contents  # Wrapped by after()
+    func = getattr(func, "__func__", func)
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    code = getattr(func, "__code__", None)
+    if "<lambda>" in name and code is not None:
+        name = f"{name.replace('.<locals>', '')}:{code.co_firstlineno}"
+    return name
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class Instrumentation:
+    """Collects call counts and latencies per handler name.
+
+    The last max_samples latencies of each handler are kept for the
+    percentiles; counts, totals and maxima cover every call. record() is
+    thread-safe, so methods that run on worker threads (chart rendering,
+    the write-ahead log) can be timed too; only Tk callbacks count as frames.
+    """
+
+    def __init__(self, slow_frame=SLOW_FRAME, max_samples=10000, warn=True):
+        self.slow_frame = slow_frame
+        self.max_samples = max_samples
+        self.warn = warn
+        self.profiler = None
+        self._profiling = False
+        self._lock = threading.Lock()
+        self._stats = {}  # name -> [count, total, max, slow frames, samples]
+        self._patched = []  # (owner, attribute, original), for uninstall()
+
+    def record(self, name, seconds, frame=False):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [0, 0.0, 0.0, 0, deque(maxlen=self.max_samples)]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[4].append(seconds)
+            slow = frame and seconds > self.slow_frame
+            if slow:
+                stats[3] += 1
+        if slow and self.warn:
+            print(f"Slow frame: {name} blocked the main loop for {seconds * 1000:.1f} ms", file=sys.stderr)
+
+    def timed(self, name, func, frame=False):
+        """Return func wrapped so every call is recorded under name."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start, frame)
+        return wrapper
+
+    def wrap(self, owner, *names):
+        """Time the named methods of a class (or functions of a module) from now on."""
+        prefix = getattr(owner, "__qualname__", None) or owner.__name__
+        for name in names:
+            original = getattr(owner, name)
+            self._patched.append((owner, name, original))
+            setattr(owner, name, self.timed(f"{prefix}.{name}", original))
+
+    def install_tk(self):
+        """Time every Tk callback registered from now on.
+
+        Tkinter routes each command, binding and after() callback through
+        tkinter.CallWrapper, so replacing it covers all of them. Install
+        before the widgets are created.
+        """
+        instrumentation = self
+        original = tkinter.CallWrapper
+
+        class TimedCallWrapper(original):
+            def __init__(self, func, subst, widget):
+                super().__init__(func, subst, widget)
+                self.name = callback_name(func)
+
+            def __call__(self, *args):
+                start = time.perf_counter()
+                try:
+                    return super().__call__(*args)
+                finally:
+                    instrumentation.record(self.name, time.perf_counter() - start, frame=True)
+
+        self._patched.append((tkinter, "CallWrapper", original))
+        tkinter.CallWrapper = TimedCallWrapper
+
+    def uninstall(self):
+        """Undo wrap() and install_tk(). Callbacks already registered stay timed."""
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            setattr(owner, name, original)
+        self.stop_profile()
+
+    # Profiling
+
+    def start_profile(self):
+        """Run cProfile on the calling thread (the Tk thread) until stop_profile()."""
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        self._profiling = True
+
+    def stop_profile(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self._profiling = False
+
+    def dump_stats(self, path):
+        """Write the cProfile data so far as a pstats file (read it with pstats.Stats(path))."""
+        self.profiler.disable()
+        try:
+            self.profiler.dump_stats(path)
+        finally:
+            if self._profiling:
+                self.profiler.enable()
+
+    # Reports
+
+    def report(self):
+        """Return {name: stats} in milliseconds, slowest total first."""
+        with self._lock:
+            snapshot = [(name, stats[:4], sorted(stats[4])) for name, stats in self._stats.items()]
+        report = {}
+        for name, (count, total, longest, slow), samples in sorted(snapshot, key=lambda entry: -entry[1][1]):
+            report[name] = {
+                "count": count,
+                "total_ms": total * 1000,
+                "mean_ms": total / count * 1000,
+                "p50_ms": percentile(samples, 0.50) * 1000,
+                "p99_ms": percentile(samples, 0.99) * 1000,
+                "max_ms": longest * 1000,
+                "slow_frames": slow,
+            }
+        return report
+
+    def format_report(self, top=30):
+        lines = [f"  {'calls':>7} {'total ms':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'slow':>5}  handler"]
+        for name, stats in list(self.report().items())[:top]:
+            lines.append(f"  {stats['count']:7d} {stats['total_ms']:10.1f} {stats['p50_ms']:8.2f} "
+                         f"{stats['p99_ms']:8.2f} {stats['max_ms']:8.2f} {stats['slow_frames']:5d}  {name}")
+        return "\n".join(["Handler latency (slow = frames over "
+                          f"{self.slow_frame * 1000:.0f} ms):"] + lines)
+
+    def export_json(self, path):
+        with open(path, "w") as file:
+            json.dump({"slow_frame_ms": self.slow_frame * 1000, "handlers": self.report()}, file, indent=2)
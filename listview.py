@@ -0,0 +1,125 @@
+import tkinter as tk
+
+
+class ListView:
+    """Keeps a Tk Listbox in sync with a sequence of rows by applying diffs.
+
+    rows is any sequence supporting len() and indexing (a ShoppingList or a
+    plain list) and format_row turns one row into the text shown for it.
+    Callers report what changed with row_inserted, row_deleted and
+    row_changed, and only the affected Listbox lines are touched.
+
+    In virtual mode the Listbox only ever holds the visible window of rows.
+    Scrolling re-formats just that window, so rendering cost does not depend
+    on the length of the list. A Scrollbar must be given in that mode.
+    """
+
+    def __init__(self, listbox, rows, format_row, virtual=False, scrollbar=None):
+        self.listbox = listbox
+        self.rows = rows
+        self.format_row = format_row
+        self.virtual = virtual
+        self.scrollbar = scrollbar
+        self.top = 0  # First row shown (virtual mode)
+        self._shown = []  # Texts currently in the Listbox (virtual mode)
+        self._shown_top = 0  # Value of top when _shown was rendered
+
+        if not virtual:
+            if scrollbar is not None:
+                scrollbar.config(command=listbox.yview)
+                listbox.config(yscrollcommand=scrollbar.set)
+        else:
+            scrollbar.config(command=self.yview)
+            listbox.bind("<MouseWheel>", self._on_mousewheel)
+            listbox.bind("<Button-4>", lambda event: self.yview("scroll", -1, "units"))
+            listbox.bind("<Button-5>", lambda event: self.yview("scroll", 1, "units"))
+
+    @property
+    def height(self):
+        return int(self.listbox.cget("height"))
+
+    def refresh(self):
+        """Redraw every row (or, in virtual mode, the visible window)."""
+        if self.virtual:
+            self._render_window()
+            return
+        self.listbox.delete(0, tk.END)
+        if len(self.rows):
+            self.listbox.insert(tk.END, *(self.format_row(row) for row in self.rows))
+
+    def row_inserted(self, index):
+        if self.virtual:
+            self._render_window()
+        else:
+            self.listbox.insert(index, self.format_row(self.rows[index]))
+
+    def row_deleted(self, index):
+        if self.virtual:
+            self._clamp_top()
+            self._render_window()
+        else:
+            self.listbox.delete(index)
+
+    def row_changed(self, index):
+        if self.virtual:
+            if self.top <= index < self.top + self.height:
+                self._render_window()
+            return
+        selected = index in self.listbox.curselection()
+        self.listbox.delete(index)
+        self.listbox.insert(index, self.format_row(self.rows[index]))
+        if selected:
+            self.listbox.selection_set(index)
+
+    def selected_index(self):
+        """Return the row index of the selected line, or None."""
+        selected = self.listbox.curselection()
+        if not selected:
+            return None
+        return self.top + selected[0] if self.virtual else selected[0]
+
+    # Virtual scrolling
+
+    def yview(self, *args):
+        """Scrollbar command: handles "moveto" and "scroll" requests."""
+        total = len(self.rows)
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.height if args[2] == "pages" else 1)
+            self.top += step
+        self._clamp_top()
+        self._render_window()
+
+    def _on_mousewheel(self, event):
+        self.yview("scroll", -1 if event.delta > 0 else 1, "units")
+        return "break"
+
+    def _clamp_top(self):
+        self.top = max(0, min(self.top, len(self.rows) - self.height))
+
+    def _render_window(self):
+        """Update only the window lines whose text differs from what is shown."""
+        end = min(self.top + self.height, len(self.rows))
+        texts = [self.format_row(self.rows[index]) for index in range(self.top, end)]
+        selected_rows = [self._shown_top + line for line in self.listbox.curselection()]
+        for line, text in enumerate(texts):
+            if line < len(self._shown):
+                if self._shown[line] != text:
+                    self.listbox.delete(line)
+                    self.listbox.insert(line, text)
+            else:
+                self.listbox.insert(tk.END, text)
+        if len(self._shown) > len(texts):
+            self.listbox.delete(len(texts), tk.END)
+        self._shown = texts
+        self._shown_top = self.top
+        self.listbox.selection_clear(0, tk.END)
+        for row in selected_rows:
+            if self.top <= row < end:
+                self.listbox.selection_set(row - self.top)
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self.top / total, end / total)
+        else:
+            self.scrollbar.set(0, 1)
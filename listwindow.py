@@ -0,0 +1,304 @@
+import base64
+import tkinter as tk
+from tkinter import ttk, messagebox, simpledialog, filedialog
+
+from core import PlannerError, format_item
+from listview import ListView
+
+# Lists with at least this many items render only the visible rows
+VIRTUAL_LIST_THRESHOLD = 500
+
+
+class ListWindow:
+    """One open shopping-list window and the widgets that belong to it.
+
+    Each window subscribes to its list's changes in the app's PlannerCore, so
+    edits made in any window (or by an import) show up in every window open
+    on that list. Changes are queued and drawn together in one after_idle
+    callback, so a burst of edits costs one redraw per window instead of one
+    per edit.
+    """
+
+    def __init__(self, app, list_name):
+        self.app = app
+        self.core = app.core
+        self.list_name = list_name
+        self._pending = []  # ListChanges not drawn yet
+        self._redraw_id = None
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title(f"Shopping List: {list_name}")
+        self.window.configure(bg=app.bg_color)
+        self.window.geometry("600x600")  # Set a fixed window size
+
+        # Frame for items
+        items_frame = ttk.Frame(self.window, padding="20")
+        items_frame.grid(row=0, column=0, sticky="nsew")
+        items_frame.place(relx=0.5, rely=0.5, anchor="center")  # Center the frame
+
+        # Listbox for items
+        self.items_listbox = tk.Listbox(
+            items_frame, width=50, height=10, font=app.label_font, bg=app.listbox_bg, fg=app.listbox_fg
+        )
+        self.items_listbox.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
+        items_scrollbar = ttk.Scrollbar(items_frame, orient=tk.VERTICAL)
+        items_scrollbar.grid(row=0, column=2, sticky="nsw", pady=5)
+        items = self.core.get_list(list_name)["items"]
+        self.items_view = ListView(
+            self.items_listbox, items, format_item,
+            virtual=len(items) >= VIRTUAL_LIST_THRESHOLD, scrollbar=items_scrollbar,
+        )
+
+        # Entry for new item
+        self.new_item_entry = ttk.Entry(items_frame, width=30, font=app.label_font)
+        self.new_item_entry.grid(row=1, column=0, padx=5, pady=5)
+
+        # Entry for item price
+        self.new_item_price_entry = ttk.Entry(items_frame, width=10, font=app.label_font)
+        self.new_item_price_entry.grid(row=1, column=1, padx=5, pady=5)
+
+        # Dropdown for item category
+        self.category_var = tk.StringVar()
+        self.category_dropdown = ttk.Combobox(
+            items_frame, textvariable=self.category_var, values=app.categories, width=15, font=app.label_font
+        )
+        self.category_dropdown.grid(row=1, column=2, padx=5, pady=5)
+        self.category_dropdown.current(0)  # Set default category
+
+        # Add Item Button (with dynamic text)
+        self.add_item_button = ttk.Button(
+            items_frame, text="Add Item", command=self.add_item, style="Accent.TButton"
+        )
+        self.add_item_button.grid(row=2, column=0, pady=10, padx=5, sticky="ew")
+
+        # Update button text when entry fields change
+        self.new_item_entry.bind("<KeyRelease>", self.update_add_item_button)
+        self.new_item_price_entry.bind("<KeyRelease>", self.update_add_item_button)
+
+        # Remove Selected Item Button
+        remove_item_button = ttk.Button(
+            items_frame, text="Remove Selected Item", command=self.remove_item, style="Accent.TButton"
+        )
+        remove_item_button.grid(row=2, column=1, pady=10, padx=5, sticky="ew")
+
+        # Mark as Purchased Button
+        purchase_item_button = ttk.Button(
+            items_frame, text="Mark as Purchased", command=self.purchase_item, style="Accent.TButton"
+        )
+        purchase_item_button.grid(row=3, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
+
+        # Modify Budget Button
+        modify_budget_button = ttk.Button(
+            items_frame, text="Modify Budget", command=self.modify_budget, style="Accent.TButton"
+        )
+        modify_budget_button.grid(row=4, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
+
+        # Export List Button
+        export_list_button = ttk.Button(
+            items_frame, text="Export List", command=self.export_list, style="Accent.TButton"
+        )
+        export_list_button.grid(row=5, column=0, pady=10, padx=5, sticky="ew")
+
+        # Import Items Button
+        import_items_button = ttk.Button(
+            items_frame, text="Import Items", command=self.import_items, style="Accent.TButton"
+        )
+        import_items_button.grid(row=5, column=1, pady=10, padx=5, sticky="ew")
+
+        # Back Button
+        back_button = ttk.Button(
+            items_frame, text="Back", command=self.window.destroy, style="Accent.TButton"
+        )
+        back_button.grid(row=6, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
+
+        # Budget Labels
+        self.budget_label = ttk.Label(items_frame, text="", font=app.label_font, background=app.bg_color)
+        self.budget_label.grid(row=7, column=0, columnspan=2, pady=5)
+
+        self.spent_label = ttk.Label(items_frame, text="", font=app.label_font, background=app.bg_color)
+        self.spent_label.grid(row=8, column=0, columnspan=2, pady=5)
+
+        self.remaining_label = ttk.Label(items_frame, text="", font=app.label_font, background=app.bg_color)
+        self.remaining_label.grid(row=9, column=0, columnspan=2, pady=5)
+
+        # Budget Exceed Warning Label
+        self.exceed_warning_label = ttk.Label(
+            items_frame, text="", font=app.label_font, background=app.bg_color, foreground=app.warning_color
+        )
+        self.exceed_warning_label.grid(row=10, column=0, columnspan=2, pady=5)
+
+        # Pie Chart Button
+        pie_chart_button = ttk.Button(
+            items_frame, text="Show Spending Breakdown", command=self.show_pie_chart, style="Accent.TButton"
+        )
+        pie_chart_button.grid(row=11, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
+
+        self.update_items_listbox()
+        self.core.subscribe(self.on_list_change, list_name)
+        self.window.bind("<Destroy>", self._on_destroy)
+
+    # Model changes
+
+    def on_list_change(self, change):
+        """Queue a ListChange from the core and schedule one redraw for the next idle cycle."""
+        if change.kind == "list_deleted":
+            self.window.destroy()
+            return
+        self._pending.append(change)
+        if self._redraw_id is None:
+            self._redraw_id = self.window.after_idle(self._redraw)
+
+    def _redraw(self):
+        """Apply the queued changes to the Listbox in one go, then update the budget labels once.
+
+        A run of inserts (items are appended) or of in-place changes is applied
+        row by row. Anything else, such as a delete mixed with other edits, has
+        row numbers that no longer match the list, so the view is redrawn.
+        """
+        self._redraw_id = None
+        changes = [change for change in self._pending if change.kind != "budget"]
+        self._pending = []
+        kinds = {change.kind for change in changes}
+        if (len(changes) == 1 and changes[0].kind != "items") or kinds in ({"insert"}, {"change"}):
+            for change in changes:
+                if change.kind == "insert":
+                    self.items_view.row_inserted(change.row)
+                elif change.kind == "delete":
+                    self.items_view.row_deleted(change.row)
+                else:
+                    self.items_view.row_changed(change.row)
+        elif changes:
+            self.items_view.refresh()
+        self.update_budget_labels()
+
+    def _on_destroy(self, event):
+        # <Destroy> also fires for every child widget; only the window itself matters
+        if event.widget is not self.window:
+            return
+        self.core.unsubscribe(self.on_list_change, self.list_name)
+        if self._redraw_id is not None:
+            self.window.after_cancel(self._redraw_id)
+            self._redraw_id = None
+
+    # Actions
+
+    def update_add_item_button(self, event=None):
+        """Update the 'Add Item' button text with the current item name and price."""
+        item_name = self.new_item_entry.get()
+        item_price = self.new_item_price_entry.get()
+        if item_name and item_price:
+            self.add_item_button.config(text=f"Add Item: {item_name} - ${item_price}")
+        else:
+            self.add_item_button.config(text="Add Item")
+
+    def add_item(self):
+        try:
+            self.core.add_item(
+                self.list_name, self.new_item_entry.get(), self.new_item_price_entry.get(), self.category_var.get()
+            )
+        except PlannerError as e:
+            self.app.show_error(e)
+            return
+        self.new_item_entry.delete(0, tk.END)
+        self.new_item_price_entry.delete(0, tk.END)
+        self.category_dropdown.current(0)  # Reset category dropdown
+        self.update_add_item_button()  # Reset button text
+
+    def remove_item(self):
+        item_index = self.items_view.selected_index()
+        if item_index is not None:
+            self.core.remove_item(self.list_name, item_index)
+
+    def purchase_item(self):
+        item_index = self.items_view.selected_index()
+        if item_index is not None:
+            self.core.purchase_item(self.list_name, item_index)
+
+    def modify_budget(self):
+        """Allow the user to modify the initial budget."""
+        new_budget = simpledialog.askfloat(
+            "Modify Budget", f"Enter the new budget for '{self.list_name}':", parent=self.window
+        )
+        if new_budget is not None:
+            try:
+                self.core.set_budget(self.list_name, new_budget)
+            except PlannerError as e:  # nan or inf
+                self.app.show_error(e)
+
+    def export_list(self):
+        """Export the shopping list to a text, CSV or JSON-lines file."""
+        file_path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".txt",
+            filetypes=[("Text Files", "*.txt"), ("CSV Files", "*.csv"), ("JSON Lines", "*.jsonl")],
+        )
+        if file_path:
+            if file_path.lower().endswith((".csv", ".jsonl")):
+                self.core.export_items(self.list_name, file_path)
+            else:
+                self.core.export_list(self.list_name, file_path)
+            messagebox.showinfo("Export Successful", f"Shopping list exported to {file_path}", parent=self.window)
+
+    def import_items(self):
+        """Bulk-import items from a CSV or JSON-lines file; the window redraws once afterwards."""
+        file_path = filedialog.askopenfilename(
+            parent=self.window,
+            filetypes=[("CSV or JSON Lines", "*.csv *.jsonl"), ("CSV Files", "*.csv"), ("JSON Lines", "*.jsonl")],
+        )
+        if not file_path:
+            return
+        try:
+            stats = self.core.import_items(self.list_name, file_path)
+        except PlannerError as e:
+            self.app.show_error(e)
+            return
+        messagebox.showinfo("Import Successful", f"Imported {stats}.", parent=self.window)
+
+    # Drawing
+
+    def update_items_listbox(self):
+        """Redraw the whole items Listbox and the budget labels."""
+        self.items_view.refresh()
+        self.update_budget_labels()
+
+    def update_budget_labels(self):
+        """Update the budget labels from the list's running totals."""
+        summary = self.core.budget_summary(self.list_name)
+        self.budget_label.config(text=f"Budget: ${summary['budget']:.2f}")
+        self.spent_label.config(text=f"Spent: ${summary['spent']:.2f}")
+        self.remaining_label.config(text=f"Remaining: ${summary['remaining']:.2f}")
+
+        # Check if budget is exceeded
+        if summary["exceeded"]:
+            self.exceed_warning_label.config(text=f"Budget Exceeded by: ${summary['exceeded']:.2f}")
+        else:
+            self.exceed_warning_label.config(text="")
+
+    def show_pie_chart(self):
+        """Show the spending breakdown, rendered on the chart worker thread."""
+        future = self.app.charts.request(
+            (self.core.username, self.list_name),
+            self.core.get_list(self.list_name)["items"],
+            f"Spending Breakdown: {self.list_name}",
+        )
+
+        pie_chart_window = tk.Toplevel(self.window)
+        pie_chart_window.title("Spending Breakdown")
+        chart_label = ttk.Label(pie_chart_window, text="Rendering chart...", font=self.app.label_font)
+        chart_label.pack(padx=20, pady=20)
+
+        def show_when_ready():
+            if not pie_chart_window.winfo_exists():
+                return
+            if not future.done():
+                pie_chart_window.after(30, show_when_ready)
+                return
+            try:
+                image = tk.PhotoImage(master=pie_chart_window, data=base64.b64encode(future.result()))
+            except Exception as e:
+                chart_label.config(text=f"Could not render chart: {e}")
+                return
+            chart_label.config(image=image, text="")
+            chart_label.image = image  # Keep a reference so Tk does not drop the image
+
+        show_when_ready()
@@ -1,24 +1,39 @@
+import time
+_START = time.perf_counter()  # Taken before any other import, for --startup-report
+
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, filedialog
+from tkinter import ttk, messagebox, simpledialog
 from tkinter import font as tkFont
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import json
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from charts import ChartRenderer
+from core import CATEGORIES, DuplicateError, MissingInputError, PlannerCore, PlannerError, format_item
+from listwindow import ListWindow
+
+# Household sync is enabled by pointing PLANNER_SYNC_URL at a sync server
+# (see sync.py); PLANNER_HOUSEHOLD names the shared space.
+SYNC_INTERVAL_MS = 5000
+
 
 class ShoppingListApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Smart Household Planner")
-        self.users = {}  # Stores user accounts
-        self.current_user = None  # Tracks the currently logged-in user
-        self.shopping_lists = {}  # Stores all shopping lists for the current user
+        self.core = PlannerCore(  # Users, lists, items and budgets; all business logic lives here
+            sync_transport=self._sync_transport(), household=os.environ.get("PLANNER_HOUSEHOLD")
+        )
+        self._sync_id = None
+        self.charts = ChartRenderer()  # Renders and caches spending charts off the Tk thread
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner")  # Slow work like password hashing
 
         # Predefined categories
-        self.categories = ["Groceries", "Utilities", "Entertainment", "Transport", "Health", "Other"]
+        self.categories = CATEGORIES
 
-        # Load saved data (if any)
-        self.load_data()
+        # Load saved data (if any) in the background while the login screen shows
+        self.data_loaded = threading.Event()
+        threading.Thread(target=self._load_data_in_background, name="load-data", daemon=True).start()
 
         # Set up fonts and colors
         self.title_font = tkFont.Font(family="Helvetica", size=18, weight="bold")
@@ -78,32 +93,67 @@ class ShoppingListApp:
         )
         self.signup_button.grid(row=3, column=1, pady=10, padx=5, sticky="ew")
 
+        # Keep login disabled until background loading has finished
+        if not self.data_loaded.is_set():
+            self.set_login_buttons_enabled(False)
+            self.root.after(20, self._enable_login_when_loaded)
+
+    def _enable_login_when_loaded(self):
+        if self.data_loaded.is_set():
+            self.set_login_buttons_enabled(True)
+        else:
+            self.root.after(20, self._enable_login_when_loaded)
+
+    def show_error(self, error):
+        """Show a PlannerError raised by the core in a message box."""
+        if isinstance(error, (DuplicateError, MissingInputError)):
+            messagebox.showwarning(error.title, str(error))
+        else:
+            messagebox.showerror(error.title, str(error))
+
+    def run_in_background(self, work, on_done):
+        """Run work() on the worker thread, then call on_done(future) on the Tk thread."""
+        future = self.worker.submit(work)
+
+        def poll():
+            if future.done():
+                on_done(future)
+            else:
+                self.root.after(20, poll)
+
+        self.root.after(20, poll)
+
     def login(self):
-        """Handle user login."""
+        """Handle user login. Password hashing runs off the Tk thread."""
         username = self.username_entry.get()
         password = self.password_entry.get()
-
-        if username in self.users and self.users[username]["password"] == password:
-            self.current_user = username
-            self.shopping_lists = self.users[username]["shopping_lists"]
-            self.show_main_screen()
-        else:
-            messagebox.showerror("Login Failed", "Invalid username or password.")
+        self.set_login_buttons_enabled(False)
+        self.run_in_background(lambda: self.core.login(username, password), self.finish_login)
 
     def signup(self):
-        """Handle user signup."""
+        """Handle user signup. Password hashing runs off the Tk thread."""
         username = self.username_entry.get()
         password = self.password_entry.get()
+        self.set_login_buttons_enabled(False)
+        self.run_in_background(lambda: self.core.signup(username, password), self.finish_login)
 
-        if username in self.users:
-            messagebox.showerror("Signup Failed", "Username already exists.")
-        elif username and password:
-            self.users[username] = {"password": password, "shopping_lists": {}}
-            self.current_user = username
-            self.shopping_lists = self.users[username]["shopping_lists"]
-            self.show_main_screen()
+    def finish_login(self, future):
+        try:
+            future.result()
+        except PlannerError as e:
+            self.set_login_buttons_enabled(True)
+            self.show_error(e)
+        except Exception as e:
+            self.set_login_buttons_enabled(True)
+            messagebox.showerror("Error", f"Could not load your data: {e}")
         else:
-            messagebox.showerror("Signup Failed", "Please enter a username and password.")
+            self.show_main_screen()
+            self.schedule_sync()
+
+    def set_login_buttons_enabled(self, enabled):
+        for button in (self.login_button, self.signup_button):
+            if button.winfo_exists():
+                button.state(["!disabled"] if enabled else ["disabled"])
 
     def show_main_screen(self):
         """Display the main screen after login."""
@@ -148,7 +198,23 @@ class ShoppingListApp:
             command=self.delete_selected_list,
             style="Accent.TButton",
         )
-        self.delete_list_button.grid(row=3, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
+        self.delete_list_button.grid(row=3, column=0, pady=10, padx=5, sticky="ew")
+
+        self.search_button = ttk.Button(
+            self.main_frame,
+            text="Search Items",
+            command=self.open_search_window,
+            style="Accent.TButton",
+        )
+        self.search_button.grid(row=3, column=1, pady=10, padx=5, sticky="ew")
+
+        self.analytics_button = ttk.Button(
+            self.main_frame,
+            text="Spending Analytics",
+            command=self.open_analytics_window,
+            style="Accent.TButton",
+        )
+        self.analytics_button.grid(row=4, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
 
         # Logout Button
         self.logout_button = ttk.Button(
@@ -157,25 +223,84 @@ class ShoppingListApp:
             command=self.logout,
             style="Accent.TButton",
         )
-        self.logout_button.grid(row=4, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
+        self.logout_button.grid(row=5, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
 
-        # Update listbox with saved data
+        # Update listbox with saved data, then row by row as lists are created or deleted
         self.update_listbox()
+        self.core.subscribe(self.on_list_change)
+
+    def on_list_change(self, change):
+        """Insert or delete the one row of the list of lists that a ListChange affects."""
+        if change.kind == "list_added":
+            self.listbox.insert(tk.END, change.list_name)  # New lists go last, as in the core
+        elif change.kind == "list_deleted":
+            names = self.listbox.get(0, tk.END)
+            if change.list_name in names:
+                self.listbox.delete(names.index(change.list_name))
+
+    @staticmethod
+    def _sync_transport():
+        url = os.environ.get("PLANNER_SYNC_URL")
+        if not url:
+            return None
+        from sync import HTTPTransport
+
+        return HTTPTransport(url)
+
+    def schedule_sync(self):
+        """Exchange changes with the household every SYNC_INTERVAL_MS while logged in."""
+        if self.core.sync is not None:
+            self._sync_id = self.root.after(SYNC_INTERVAL_MS, self.sync_in_background)
+
+    def sync_in_background(self):
+        """Push and pull on the worker thread, then apply what was pulled on the Tk thread."""
+        self._sync_id = None
+        sync = self.core.sync
+
+        def apply(future):
+            if self.core.sync is not sync:
+                return  # Logged out in the meantime
+            try:
+                self.core.apply_sync(future.result())
+            except Exception as e:
+                print(f"Error syncing: {e}")
+            self.schedule_sync()
+
+        self.run_in_background(sync.exchange, apply)
 
     def logout(self):
         """Handle user logout."""
+        if self._sync_id is not None:
+            self.root.after_cancel(self._sync_id)
+            self._sync_id = None
+        self.core.unsubscribe(self.on_list_change)
         self.save_data()  # Save data before logging out
-        self.current_user = None
-        self.shopping_lists = {}
+        sync = self.core.sync
+        self.core.logout(save=False, push=False)
+        if sync is not None:
+            self.push_in_background(sync)
         self.show_login_screen()
 
+    def push_in_background(self, sync):
+        """Send a closed session's unsent changes on the worker thread; they stay in the outbox on failure."""
+        def push():
+            try:
+                sync.push()
+            except Exception as e:
+                print(f"Error syncing: {e}")
+            else:
+                sync.save_state()
+
+        self.worker.submit(push)
+
     def add_new_list(self):
         list_name = simpledialog.askstring("New List", "Enter a name for the new shopping list:")
-        if list_name and list_name not in self.shopping_lists:
-            self.shopping_lists[list_name] = {"items": [], "budget": 0, "spent": 0, "categories": {}}
-            self.update_listbox()
-        elif list_name in self.shopping_lists:
-            messagebox.showwarning("Duplicate", "A list with this name already exists!")
+        if not list_name:
+            return
+        try:
+            self.core.create_list(list_name)
+        except PlannerError as e:
+            self.show_error(e)
 
     def open_selected_list(self):
         selected = self.listbox.curselection()
@@ -187,258 +312,231 @@ class ShoppingListApp:
         selected = self.listbox.curselection()
         if selected:
             list_name = self.listbox.get(selected)
-            del self.shopping_lists[list_name]
-            self.update_listbox()
+            self.core.delete_list(list_name)  # Closes its windows and refreshes the listbox
 
     def update_listbox(self):
         self.listbox.delete(0, tk.END)
-        for list_name in self.shopping_lists:
+        for list_name in self.core.list_names():
             self.listbox.insert(tk.END, list_name)
 
-    def open_list_window(self, list_name):
-        list_window = tk.Toplevel(self.root)
-        list_window.title(f"Shopping List: {list_name}")
-        list_window.configure(bg=self.bg_color)
-        list_window.geometry("600x600")  # Set a fixed window size
-
-        # Frame for items
-        items_frame = ttk.Frame(list_window, padding="20")
-        items_frame.grid(row=0, column=0, sticky="nsew")
-        items_frame.place(relx=0.5, rely=0.5, anchor="center")  # Center the frame
-
-        # Listbox for items
-        self.items_listbox = tk.Listbox(
-            items_frame, width=50, height=10, font=self.label_font, bg=self.listbox_bg, fg=self.listbox_fg
-        )
-        self.items_listbox.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
-
-        # Entry for new item
-        self.new_item_entry = ttk.Entry(items_frame, width=30, font=self.label_font)
-        self.new_item_entry.grid(row=1, column=0, padx=5, pady=5)
+    def open_search_window(self):
+        """Search items across all lists as you type."""
+        search_window = tk.Toplevel(self.root)
+        search_window.title("Search Items")
+        search_window.configure(bg=self.bg_color)
 
-        # Entry for item price
-        self.new_item_price_entry = ttk.Entry(items_frame, width=10, font=self.label_font)
-        self.new_item_price_entry.grid(row=1, column=1, padx=5, pady=5)
+        search_frame = ttk.Frame(search_window, padding="20")
+        search_frame.pack(fill="both", expand=True)
 
-        # Dropdown for item category
-        self.category_var = tk.StringVar()
-        self.category_dropdown = ttk.Combobox(items_frame, textvariable=self.category_var, values=self.categories, width=15, font=self.label_font)
-        self.category_dropdown.grid(row=1, column=2, padx=5, pady=5)
-        self.category_dropdown.current(0)  # Set default category
+        query_entry = ttk.Entry(search_frame, width=30, font=self.label_font)
+        query_entry.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
 
-        # Add Item Button (with dynamic text)
-        self.add_item_button = ttk.Button(
-            items_frame, text="Add Item", command=lambda: self.add_item(list_name), style="Accent.TButton"
+        category_var = tk.StringVar(value="All Categories")
+        category_dropdown = ttk.Combobox(
+            search_frame, textvariable=category_var, values=["All Categories"] + self.categories,
+            width=15, font=self.label_font, state="readonly",
         )
-        self.add_item_button.grid(row=2, column=0, pady=10, padx=5, sticky="ew")
-
-        # Update button text when entry fields change
-        self.new_item_entry.bind("<KeyRelease>", lambda event: self.update_add_item_button(list_name))
-        self.new_item_price_entry.bind("<KeyRelease>", lambda event: self.update_add_item_button(list_name))
+        category_dropdown.grid(row=0, column=1, padx=5, pady=5)
 
-        # Remove Selected Item Button
-        remove_item_button = ttk.Button(
-            items_frame, text="Remove Selected Item", command=lambda: self.remove_item(list_name), style="Accent.TButton"
+        status_var = tk.StringVar(value="Any Status")
+        status_dropdown = ttk.Combobox(
+            search_frame, textvariable=status_var, values=["Any Status", "Purchased", "Not Purchased"],
+            width=13, font=self.label_font, state="readonly",
         )
-        remove_item_button.grid(row=2, column=1, pady=10, padx=5, sticky="ew")
+        status_dropdown.grid(row=0, column=2, padx=5, pady=5)
 
-        # Mark as Purchased Button
-        purchase_item_button = ttk.Button(
-            items_frame, text="Mark as Purchased", command=lambda: self.purchase_item(list_name), style="Accent.TButton"
+        results_listbox = tk.Listbox(
+            search_frame, width=70, height=15, font=self.label_font, bg=self.listbox_bg, fg=self.listbox_fg
         )
-        purchase_item_button.grid(row=3, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
-
-        # Modify Budget Button
-        modify_budget_button = ttk.Button(
-            items_frame, text="Modify Budget", command=lambda: self.modify_budget(list_name), style="Accent.TButton"
-        )
-        modify_budget_button.grid(row=4, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
-
-        # Export List Button
-        export_list_button = ttk.Button(
-            items_frame, text="Export List", command=lambda: self.export_list(list_name), style="Accent.TButton"
+        results_listbox.grid(row=1, column=0, columnspan=3, padx=5, pady=5)
+
+        results_label = ttk.Label(search_frame, text="", font=self.label_font, background=self.bg_color)
+        results_label.grid(row=2, column=0, columnspan=3, pady=5)
+
+        results = []
+
+        def run_search(event=None):
+            category = category_var.get()
+            status = status_var.get()
+            start = time.perf_counter()
+            results[:] = self.core.search_items(
+                query_entry.get(),
+                category=None if category == "All Categories" else category,
+                purchased=None if status == "Any Status" else status == "Purchased",
+                limit=200,
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+            results_listbox.delete(0, tk.END)
+            if results:
+                results_listbox.insert(tk.END, *(f"{list_name}: {format_item(item)}" for list_name, item in results))
+            results_label.config(text=f"{len(results)} results in {elapsed:.1f} ms (double-click to open the list)")
+
+        def open_result(event):
+            selected = results_listbox.curselection()
+            if selected:
+                self.open_list_window(results[selected[0]][0])
+
+        query_entry.bind("<KeyRelease>", run_search)
+        category_dropdown.bind("<<ComboboxSelected>>", run_search)
+        status_dropdown.bind("<<ComboboxSelected>>", run_search)
+        results_listbox.bind("<Double-Button-1>", open_result)
+        query_entry.focus_set()
+        run_search()
+
+    def open_analytics_window(self):
+        """Spending dashboard across all of the user's lists, or every user's."""
+        analytics_window = tk.Toplevel(self.root)
+        analytics_window.title("Spending Analytics")
+        analytics_window.configure(bg=self.bg_color)
+
+        analytics_frame = ttk.Frame(analytics_window, padding="20")
+        analytics_frame.pack(fill="both", expand=True)
+
+        all_users_var = tk.BooleanVar(value=False)
+        report_text = tk.Text(
+            analytics_frame, width=90, height=30, font=("Courier", 10), bg=self.listbox_bg, fg=self.listbox_fg
         )
-        export_list_button.grid(row=5, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
+        report_text.grid(row=1, column=0, columnspan=2, padx=5, pady=5)
+
+        requests = 0  # Only the newest refresh may fill in the report
+
+        def show(text):
+            report_text.config(state="normal")
+            report_text.delete("1.0", tk.END)
+            report_text.insert(tk.END, text)
+            report_text.config(state="disabled")
+
+        def refresh():
+            nonlocal requests
+            from analytics import format_report
+
+            requests += 1
+            if not all_users_var.get():
+                show(format_report(self.core.analytics_report()))
+                return
+
+            # Other users' files are read on the worker thread
+            request = requests
+            username = self.core.username
+            show("Reading every user's lists...")
+
+            def show_all_users(future):
+                if request != requests or self.core.username != username or not analytics_window.winfo_exists():
+                    return
+                try:
+                    report = self.core.analytics_report(all_users=True, stored=future.result())
+                except Exception as e:
+                    show(f"Could not build the report: {e}")
+                    return
+                show(format_report(report))
+
+            self.run_in_background(self.core.stored_analytics, show_all_users)
+
+        ttk.Checkbutton(
+            analytics_frame, text="All users", variable=all_users_var, command=refresh
+        ).grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        ttk.Button(
+            analytics_frame, text="Refresh", command=refresh, style="Accent.TButton"
+        ).grid(row=0, column=1, padx=5, pady=5, sticky="e")
+        refresh()
 
-        # Back Button
-        back_button = ttk.Button(
-            items_frame, text="Back", command=list_window.destroy, style="Accent.TButton"
-        )
-        back_button.grid(row=6, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
-
-        # Budget Labels
-        self.budget_label = ttk.Label(
-            items_frame, text=f"Budget: ${self.shopping_lists[list_name]['budget']:.2f}", font=self.label_font, background=self.bg_color
-        )
-        self.budget_label.grid(row=7, column=0, columnspan=2, pady=5)
-
-        self.spent_label = ttk.Label(
-            items_frame, text=f"Spent: ${self.shopping_lists[list_name]['spent']:.2f}", font=self.label_font, background=self.bg_color
-        )
-        self.spent_label.grid(row=8, column=0, columnspan=2, pady=5)
-
-        self.remaining_label = ttk.Label(
-            items_frame,
-            text=f"Remaining: ${self.shopping_lists[list_name]['budget'] - self.shopping_lists[list_name]['spent']:.2f}",
-            font=self.label_font,
-            background=self.bg_color,
-        )
-        self.remaining_label.grid(row=9, column=0, columnspan=2, pady=5)
-
-        # Budget Exceed Warning Label
-        self.exceed_warning_label = ttk.Label(
-            items_frame, text="", font=self.label_font, background=self.bg_color, foreground=self.warning_color
-        )
-        self.exceed_warning_label.grid(row=10, column=0, columnspan=2, pady=5)
-
-        # Pie Chart Button
-        pie_chart_button = ttk.Button(
-            items_frame, text="Show Spending Breakdown", command=lambda: self.show_pie_chart(list_name), style="Accent.TButton"
-        )
-        pie_chart_button.grid(row=11, column=0, columnspan=2, pady=10, padx=5, sticky="ew")
-
-        self.update_items_listbox(list_name)
-
-    def update_add_item_button(self, list_name):
-        """Update the 'Add Item' button text with the current item name and price."""
-        item_name = self.new_item_entry.get()
-        item_price = self.new_item_price_entry.get()
-        if item_name and item_price:
-            self.add_item_button.config(text=f"Add Item: {item_name} - ${item_price}")
-        else:
-            self.add_item_button.config(text="Add Item")
-
-    def add_item(self, list_name):
-        item_name = self.new_item_entry.get()
-        item_price = self.new_item_price_entry.get()
-        item_category = self.category_var.get()
-
-        if item_name and item_price:
-            try:
-                item_price = float(item_price)
-                if item_name not in [item[0] for item in self.shopping_lists[list_name]["items"]]:
-                    self.shopping_lists[list_name]["items"].append((item_name, item_price, False, item_category))  # (name, price, purchased, category)
-                    self.update_items_listbox(list_name)
-                    self.new_item_entry.delete(0, tk.END)
-                    self.new_item_price_entry.delete(0, tk.END)
-                    self.category_dropdown.current(0)  # Reset category dropdown
-                    self.update_add_item_button(list_name)  # Reset button text
-                else:
-                    messagebox.showwarning("Duplicate", "This item already exists in the list!")
-            except ValueError:
-                messagebox.showerror("Invalid Input", "Please enter a valid price!")
-        else:
-            messagebox.showwarning("Missing Input", "Please enter both item name and price!")
-
-    def remove_item(self, list_name):
-        selected = self.items_listbox.curselection()
-        if selected:
-            item_index = selected[0]
-            del self.shopping_lists[list_name]["items"][item_index]
-            self.update_items_listbox(list_name)
-
-    def purchase_item(self, list_name):
-        selected = self.items_listbox.curselection()
-        if selected:
-            item_index = selected[0]
-            item = self.shopping_lists[list_name]["items"][item_index]
-            if not item[2]:  # If not already purchased
-                self.shopping_lists[list_name]["items"][item_index] = (item[0], item[1], True, item[3])  # Mark as purchased
-                self.update_items_listbox(list_name)
-
-    def modify_budget(self, list_name):
-        """Allow the user to modify the initial budget."""
-        new_budget = simpledialog.askfloat("Modify Budget", f"Enter the new budget for '{list_name}':")
-        if new_budget is not None:
-            self.shopping_lists[list_name]["budget"] = new_budget
-            self.update_items_listbox(list_name)
-
-    def export_list(self, list_name):
-        """Export the shopping list to a text file."""
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text Files", "*.txt")])
-        if file_path:
-            with open(file_path, "w") as file:
-                file.write(f"Shopping List: {list_name}\n")
-                file.write(f"Budget: ${self.shopping_lists[list_name]['budget']:.2f}\n")
-                file.write(f"Spent: ${self.shopping_lists[list_name]['spent']:.2f}\n")
-                file.write(f"Remaining: ${self.shopping_lists[list_name]['budget'] - self.shopping_lists[list_name]['spent']:.2f}\n\n")
-                file.write("Items:\n")
-                for item in self.shopping_lists[list_name]["items"]:
-                    status = "Purchased" if item[2] else "Not Purchased"
-                    file.write(f"{item[0]} - ${item[1]:.2f} - {status} - Category: {item[3]}\n")
-            messagebox.showinfo("Export Successful", f"Shopping list exported to {file_path}")
-
-    def update_items_listbox(self, list_name):
-        self.items_listbox.delete(0, tk.END)
-        for item in self.shopping_lists[list_name]["items"]:
-            status = "Purchased" if item[2] else "Not Purchased"
-            self.items_listbox.insert(tk.END, f"{item[0]} - ${item[1]:.2f} - {status} - Category: {item[3]}")
-
-        # Update budget labels
-        total_spent = sum(item[1] for item in self.shopping_lists[list_name]["items"] if item[2])
-        self.shopping_lists[list_name]["spent"] = total_spent
-        self.budget_label.config(text=f"Budget: ${self.shopping_lists[list_name]['budget']:.2f}")
-        self.spent_label.config(text=f"Spent: ${total_spent:.2f}")
-        remaining = self.shopping_lists[list_name]["budget"] - total_spent
-        self.remaining_label.config(text=f"Remaining: ${remaining:.2f}")
-
-        # Check if budget is exceeded
-        if remaining < 0:
-            self.exceed_warning_label.config(text=f"Budget Exceeded by: ${-remaining:.2f}")
-        else:
-            self.exceed_warning_label.config(text="")
-
-    def show_pie_chart(self, list_name):
-        purchased_items = [item for item in self.shopping_lists[list_name]["items"] if item[2]]
-        not_purchased_items = [item for item in self.shopping_lists[list_name]["items"] if not item[2]]
-
-        purchased_total = sum(item[1] for item in purchased_items)
-        not_purchased_total = sum(item[1] for item in not_purchased_items)
-
-        labels = ["Purchased", "Not Purchased"]
-        sizes = [purchased_total, not_purchased_total]
-
-        fig, ax = plt.subplots()
-        ax.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=90)
-        ax.axis("equal")  # Equal aspect ratio ensures the pie chart is circular.
-
-        # Embed the pie chart in the Tkinter window
-        pie_chart_window = tk.Toplevel(self.root)
-        pie_chart_window.title("Spending Breakdown")
-        canvas = FigureCanvasTkAgg(fig, master=pie_chart_window)
-        canvas.draw()
-        canvas.get_tk_widget().pack()
+    def open_list_window(self, list_name):
+        """Open a window on a list. Several windows may show the same list; they stay in sync."""
+        return ListWindow(self, list_name)
 
     def clear_frame(self):
         """Clear the current frame."""
         for widget in self.root.winfo_children():
             widget.destroy()
 
-    def load_data(self):
-        """Load user data from a JSON file."""
+    def _load_data_in_background(self):
         try:
-            if os.path.exists("users.json"):
-                with open("users.json", "r") as file:
-                    self.users = json.load(file)
-                    print("Data loaded successfully.")
-        except Exception as e:
-            print(f"Error loading data: {e}")
+            self.core.load_data()
+        finally:
+            self.data_loaded.set()
 
     def save_data(self):
-        """Save user data to a JSON file."""
+        """Save the logged-in user's changed lists."""
+        if self.core.username is None:
+            return
         try:
-            with open("users.json", "w") as file:
-                json.dump(self.users, file)
-                print("Data saved successfully.")
+            self.core.save()
+            print("Data saved successfully.")
         except Exception as e:
             print(f"Error saving data: {e}")
 
     def on_closing(self):
         """Save data and close the application."""
         self.save_data()
+        self.core.logout(save=False, push=False)  # Unsent changes go out with the next session's sync
+        self.charts.shutdown()
+        self.worker.shutdown(wait=False)
         self.root.destroy()
 
+
+def instrument_app(instrumentation):
+    """Time every Tk callback plus the persistence and drawing work that runs inside them.
+
+    Must run before the app is created, since only callbacks registered
+    afterwards are timed.
+    """
+    import charts
+    import storage
+    import wal
+
+    instrumentation.install_tk()
+    instrumentation.wrap(ShoppingListApp, "save_data")
+    instrumentation.wrap(PlannerCore, "load_data", "save", "import_items", "export_items")
+    instrumentation.wrap(storage.UserStore, "load_user", "save_user")
+    instrumentation.wrap(wal.WriteAheadLog, "flush", "compact", "checkpoint")
+    instrumentation.wrap(ListWindow, "update_items_listbox", "update_budget_labels")
+    instrumentation.wrap(charts, "render_breakdown")  # matplotlib, on the chart thread
+
+
+def export_instrumentation(instrumentation, prefix="planner"):
+    """Print the handler report and write it (and the profile, if any) next to the working directory."""
+    print(instrumentation.format_report())
+    instrumentation.export_json(f"{prefix}-instrument.json")
+    written = [f"{prefix}-instrument.json"]
+    if instrumentation.profiler is not None:
+        instrumentation.dump_stats(f"{prefix}-profile.pstats")
+        written.append(f"{prefix}-profile.pstats")
+    print(f"Wrote {', '.join(written)}")
+
+
+def report_startup(app, timer):
+    """Print startup timings once the first frame is drawn and data has loaded, then exit."""
+    import startup
+
+    timer.mark("first frame drawn")
+    app.data_loaded.wait()
+    timer.mark("user data loaded")
+    print(timer.report())
+    print(startup.format_import_breakdown())
+    app.on_closing()
+
+
 if __name__ == "__main__":
+    import startup
+
+    timer = startup.StartupTimer(_START)
+    timer.mark("imports done")
+    instrumentation = None
+    if "--instrument" in sys.argv[1:] or "--profile" in sys.argv[1:]:
+        import instrument
+
+        instrumentation = instrument.Instrumentation()
+        instrument_app(instrumentation)
+        if "--profile" in sys.argv[1:]:
+            instrumentation.start_profile()
     root = tk.Tk()
     app = ShoppingListApp(root)
-    root.mainloop()
\ No newline at end of file
+    timer.mark("app initialized")
+    if "--startup-report" in sys.argv[1:]:
+        root.after_idle(report_startup, app, timer)
+    if instrumentation is not None:
+        root.bind_all("<Control-F12>", lambda event: export_instrumentation(instrumentation))
+    root.mainloop()
+    if instrumentation is not None:
+        instrumentation.stop_profile()
+        export_instrumentation(instrumentation)
\ No newline at end of file
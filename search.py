@@ -0,0 +1,113 @@
+import bisect
+import heapq
+import re
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Lower-case word tokens of an item name or query."""
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index over one user's items across all of their lists.
+
+    Items are keyed by (list_name, item_name). The index maps name tokens,
+    categories and purchased state to sets of keys. A sorted vocabulary
+    answers token-prefix queries with bisect. Call add, remove and
+    mark_purchased as items change; PlannerCore does this on every mutation.
+    """
+
+    def __init__(self):
+        self._tokens = {}  # token -> set of keys
+        self._vocabulary = []  # sorted tokens, for prefix lookups
+        self._categories = {}  # lower-cased category -> set of keys
+        self._purchased = set()
+        self._items = {}  # key -> category, to unindex on removal
+
+    @classmethod
+    def build(cls, shopping_lists):
+        index = cls()
+        for list_name, shopping_list in shopping_lists.items():
+            index.add_list(list_name, shopping_list["items"])
+        return index
+
+    def __len__(self):
+        return len(self._items)
+
+    def add_list(self, list_name, items):
+        for name, _price, purchased, category in items:
+            self.add(list_name, name, purchased, category)
+
+    def remove_list(self, list_name):
+        for key in [key for key in self._items if key[0] == list_name]:
+            self.remove(*key)
+
+    def add(self, list_name, name, purchased, category):
+        key = (list_name, name)
+        if key in self._items:
+            return
+        self._items[key] = category
+        for token in set(tokenize(name)):
+            keys = self._tokens.get(token)
+            if keys is None:
+                keys = self._tokens[token] = set()
+                bisect.insort(self._vocabulary, token)
+            keys.add(key)
+        self._categories.setdefault(category.lower(), set()).add(key)
+        if purchased:
+            self._purchased.add(key)
+
+    def remove(self, list_name, name):
+        key = (list_name, name)
+        category = self._items.pop(key, None)
+        if category is None:
+            return
+        for token in set(tokenize(name)):
+            keys = self._tokens[token]
+            keys.discard(key)
+            if not keys:
+                del self._tokens[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        keys = self._categories[category.lower()]
+        keys.discard(key)
+        if not keys:
+            del self._categories[category.lower()]
+        self._purchased.discard(key)
+
+    def mark_purchased(self, list_name, name):
+        if (list_name, name) in self._items:
+            self._purchased.add((list_name, name))
+
+    def _prefix_matches(self, prefix):
+        """Union of the key sets of every token starting with prefix."""
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matches = set()
+        for token in self._vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self._tokens[token]
+        return matches
+
+    def search(self, text="", category=None, purchased=None, limit=100):
+        """Return up to limit (list_name, item_name) keys, sorted.
+
+        Every word of text must prefix-match a word of the item name. category
+        (case-insensitive) and purchased (True/False) filter the results when
+        given.
+        """
+        candidates = None
+        for token in sorted(set(tokenize(text)), key=len, reverse=True):
+            matches = self._prefix_matches(token)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+        if category is not None:
+            in_category = self._categories.get(category.lower(), set())
+            candidates = in_category if candidates is None else candidates & in_category
+        if candidates is None:
+            candidates = self._items.keys()
+        if purchased is not None:
+            candidates = (key for key in candidates if (key in self._purchased) == purchased)
+        return heapq.nsmallest(limit, candidates)
@@ -0,0 +1,286 @@
+import math
+from array import array
+from itertools import chain, count
+
+# Shared by all lists, so a version number identifies one state of one list
+_versions = count(1)
+
+
+class Bitmap:
+    """Packed bit column (one bit per row) supporting ordered row deletion."""
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, row):
+        return bool(self.bits[row >> 3] >> (row & 7) & 1)
+
+    def set(self, row, value):
+        if value:
+            self.bits[row >> 3] |= 1 << (row & 7)
+        else:
+            self.bits[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+    def append(self, value):
+        if self.length & 7 == 0:
+            self.bits.append(0)
+        self.length += 1
+        self.set(self.length - 1, value)
+
+    def delete(self, row):
+        """Remove one bit, shifting every later bit down by one."""
+        start = row >> 3
+        offset = row & 7
+        tail = int.from_bytes(self.bits[start:], "little")
+        low = tail & ((1 << offset) - 1)
+        tail = low | ((tail >> (offset + 1)) << offset)
+        self.length -= 1
+        size = (self.length + 7) >> 3
+        self.bits[start:] = tail.to_bytes(len(self.bits) - start, "little")[:size - start]
+
+    def count(self):
+        """Number of set bits."""
+        return int.from_bytes(self.bits, "little").bit_count()
+
+
+class ShoppingList:
+    """Column-oriented storage for the items of one shopping list.
+
+    Items are exposed as the same ``(name, price, purchased, category)``
+    tuples the rest of the app uses, but are stored as parallel columns:
+    names in a list, prices in an ``array('d')``, purchased flags in a
+    bitmap and categories as small integer codes into a per-list category
+    table. A name -> row dict makes duplicate checks and lookups by name O(1).
+
+    Running totals (spent, pending, per-category spent and pending, and the
+    purchased count) are updated in O(1) on every mutation, so budget labels,
+    charts and exports never have to rescan the items. version changes on
+    every mutation and is never reused by another list, so it can be used as
+    a cache key for anything derived from the list.
+    """
+
+    def __init__(self, items=()):
+        self.names = []
+        self.prices = array("d")
+        self.purchased = Bitmap()
+        self.category_codes = array("H")
+        self.category_names = []  # code -> category name
+        self._category_codes = {}  # category name -> code
+        self._rows = {}  # item name -> row
+
+        # Running aggregates
+        self.version = next(_versions)
+        self.spent = 0.0
+        self.pending = 0.0
+        self.purchased_count = 0
+        self.category_spent = array("d")  # code -> total of purchased items
+        self.category_pending = array("d")  # code -> total of items not purchased
+        for item in items:
+            self.append(*item)
+
+    @classmethod
+    def from_json(cls, items):
+        """Build a list from the JSON shape: a list of [name, price, purchased, category]."""
+        return cls(items)
+
+    def to_json(self):
+        """Return the items in the JSON shape used by the data files."""
+        return [list(item) for item in self]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for row in range(len(self.names)):
+            yield self[row]
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self.names)
+        return (self.names[row], self.prices[row], self.purchased[row],
+                self.category_names[self.category_codes[row]])
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    def __eq__(self, other):
+        if isinstance(other, ShoppingList):
+            return self.to_json() == other.to_json()
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ShoppingList({self.to_json()!r})"
+
+    def index(self, name):
+        """Return the row of the item with this name. Raises KeyError if missing."""
+        return self._rows[name]
+
+    def category_code(self, category):
+        """Return the code for a category, adding it to the table if needed."""
+        code = self._category_codes.get(category)
+        if code is None:
+            code = len(self.category_names)
+            self.category_names.append(category)
+            self._category_codes[category] = code
+            self.category_spent.append(0.0)
+            self.category_pending.append(0.0)
+        return code
+
+    @property
+    def pending_count(self):
+        return len(self.names) - self.purchased_count
+
+    def category_totals(self):
+        """Return {category: (spent, pending)} for categories that have items."""
+        return {
+            category: (self.category_spent[code], self.category_pending[code])
+            for code, category in enumerate(self.category_names)
+            if self.category_spent[code] or self.category_pending[code]
+        }
+
+    def _account(self, price, purchased, code, sign):
+        self.version = next(_versions)
+        if purchased:
+            self.spent += sign * price
+            self.category_spent[code] += sign * price
+            self.purchased_count += sign
+        else:
+            self.pending += sign * price
+            self.category_pending[code] += sign * price
+
+    def _recompute(self):
+        """Recompute every aggregate from the columns (O(n))."""
+        spent = [[] for _ in self.category_names]
+        pending = [[] for _ in self.category_names]
+        for row, price in enumerate(self.prices):
+            (spent if self.purchased[row] else pending)[self.category_codes[row]].append(price)
+        return {
+            "spent": math.fsum(chain.from_iterable(spent)),
+            "pending": math.fsum(chain.from_iterable(pending)),
+            "purchased_count": self.purchased.count(),
+            "category_spent": [math.fsum(prices) for prices in spent],
+            "category_pending": [math.fsum(prices) for prices in pending],
+        }
+
+    def check_aggregates(self, rel_tol=1e-9, abs_tol=1e-6):
+        """Recompute the running totals from scratch and compare.
+
+        Raises ValueError describing the first mismatch. Intended for tests
+        and debugging; it is O(n).
+        """
+        expected = self._recompute()
+        actual = {
+            "spent": self.spent,
+            "pending": self.pending,
+            "purchased_count": self.purchased_count,
+            "category_spent": list(self.category_spent),
+            "category_pending": list(self.category_pending),
+        }
+        for key, value in expected.items():
+            values = value if isinstance(value, list) else [value]
+            got = actual[key] if isinstance(value, list) else [actual[key]]
+            if len(values) != len(got) or not all(
+                math.isclose(a, b, rel_tol=rel_tol, abs_tol=abs_tol) for a, b in zip(values, got)
+            ):
+                raise ValueError(f"Aggregate {key} is {actual[key]!r}, expected {value!r}")
+
+    def append(self, name, price, purchased=False, category="Other"):
+        """Add an item at the end of the list and return its row."""
+        if name in self._rows:
+            raise ValueError(f"Duplicate item: {name}")
+        row = len(self.names)
+        self.names.append(name)
+        self.prices.append(float(price))
+        self.purchased.append(bool(purchased))
+        code = self.category_code(category)
+        self.category_codes.append(code)
+        self._rows[name] = row
+        self._account(self.prices[row], purchased, code, 1)
+        return row
+
+    def extend(self, items):
+        """Append many (name, price, purchased, category) items in one batch.
+
+        Items whose name is already in the list (or earlier in the batch) are
+        skipped. The running totals and version are updated once for the
+        whole batch rather than per item. Returns the number of items added.
+        """
+        spent = pending = 0.0
+        purchased_count = 0
+        category_spent = {}
+        category_pending = {}
+        added = 0
+        for name, price, purchased, category in items:
+            if name in self._rows:
+                continue
+            price = float(price)
+            purchased = bool(purchased)
+            code = self.category_code(category)
+            self._rows[name] = len(self.names)
+            self.names.append(name)
+            self.prices.append(price)
+            self.purchased.append(purchased)
+            self.category_codes.append(code)
+            if purchased:
+                spent += price
+                purchased_count += 1
+                category_spent[code] = category_spent.get(code, 0.0) + price
+            else:
+                pending += price
+                category_pending[code] = category_pending.get(code, 0.0) + price
+            added += 1
+        if added:
+            self.spent += spent
+            self.pending += pending
+            self.purchased_count += purchased_count
+            for code, total in category_spent.items():
+                self.category_spent[code] += total
+            for code, total in category_pending.items():
+                self.category_pending[code] += total
+            self.version = next(_versions)
+        return added
+
+    def remove(self, row):
+        """Remove the item at row and return it as a tuple."""
+        item = self[row]
+        self._account(item[1], item[2], self.category_codes[row], -1)
+        del self.names[row]
+        del self.prices[row]
+        self.purchased.delete(row)
+        del self.category_codes[row]
+        del self._rows[item[0]]
+        for later_row in range(row, len(self.names)):
+            self._rows[self.names[later_row]] = later_row
+        if not self.names:
+            self._reset_totals()  # Drop floating-point residue once the list is empty
+        return item
+
+    def _reset_totals(self):
+        self.spent = 0.0
+        self.pending = 0.0
+        for code in range(len(self.category_names)):
+            self.category_spent[code] = 0.0
+            self.category_pending[code] = 0.0
+
+    def update(self, row, price, purchased, category):
+        """Replace the price, purchased flag and category of the item at row, keeping its place."""
+        self._account(self.prices[row], self.purchased[row], self.category_codes[row], -1)
+        code = self.category_code(category)
+        self.prices[row] = float(price)
+        self.purchased.set(row, bool(purchased))
+        self.category_codes[row] = code
+        self._account(self.prices[row], purchased, code, 1)
+
+    def mark_purchased(self, row):
+        """Mark the item at row as purchased. Returns False if it already was."""
+        if self.purchased[row]:
+            return False
+        self.purchased.set(row, True)
+        code = self.category_codes[row]
+        self._account(self.prices[row], False, code, -1)
+        self._account(self.prices[row], True, code, 1)
+        return True
@@ -0,0 +1,290 @@
+"""Compact binary snapshot of all users, an alternative to users.json.
+
+Layout (little-endian, version 1)::
+
+    header   magic "PLANSNAP", u16 version, u16 reserved, u32 user count,
+             u64 string table offset, u64 user index offset
+    records  one per user: u32 length + JSON of the account fields and each
+             list's fields other than its items, then per list a u32 item
+             count followed by the item columns, padded to 8 bytes:
+             f64 prices, u32 name ids, u32 category ids, u8 flags
+    strings  u32 count, u32 end offsets, UTF-8 bytes (names, categories and
+             usernames, each stored once)
+    index    per user: u32 username id, u64 record offset
+
+Flag bit 0 is the purchased flag; bit 1 records that the price was an
+integer in the JSON, so converting back is lossless. The file is opened
+with mmap and only the header, string offsets and index are read up front;
+a user's record is decoded the first time it is asked for.
+
+Convert from and to the JSON layout with::
+
+    python snapshot.py to-binary users.json users.snap
+    python snapshot.py to-json users.snap users.json
+
+and from and to the per-user store (see storage.UserStore) with::
+
+    python snapshot.py from-store data users.snap
+    python snapshot.py to-store users.snap data
+
+The app itself reads a snapshot placed at data/users.snap lazily: a user's
+shard is written from it the first time that user logs in.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from shopping_list import ShoppingList
+from storage import UserStore, atomic_write_json, read_json
+
+MAGIC = b"PLANSNAP"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+INDEX_ENTRY = struct.Struct("<IQ")
+COUNT = struct.Struct("<I")
+
+PURCHASED = 1
+INTEGER_PRICE = 2
+
+
+def is_snapshot(path):
+    """True if path starts with the snapshot magic number."""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def _little_endian(column):
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _pad(size):
+    return -size % 8
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+
+    def id(self, text):
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.ids)
+        return string_id
+
+    def encode(self):
+        blobs = [text.encode("utf-8") for text in self.ids]
+        ends = array("I")
+        end = 0
+        for blob in blobs:
+            end += len(blob)
+            ends.append(end)
+        return COUNT.pack(len(blobs)) + _little_endian(ends).tobytes() + b"".join(blobs)
+
+
+def _encode_user(user, strings):
+    """Encode one user in the JSON shape (items as ShoppingLists or lists of lists)."""
+    # The lists and items are stored separately; null placeholders keep the key order
+    account = {key: None if key == "shopping_lists" else value for key, value in user.items()}
+    lists = [[list_name, {key: None if key == "items" else value for key, value in shopping_list.items()}]
+             for list_name, shopping_list in user["shopping_lists"].items()]
+    meta = json.dumps({"account": account, "lists": lists}).encode("utf-8")
+    parts = [COUNT.pack(len(meta)), meta, b"\0" * _pad(COUNT.size + len(meta))]
+    for shopping_list in user["shopping_lists"].values():
+        prices = array("d")
+        names = array("I")
+        categories = array("I")
+        flags = bytearray()
+        for name, price, purchased, category in shopping_list["items"]:
+            if type(price) not in (int, float) or type(purchased) is not bool or float(price) != price:
+                raise ValueError(f"Cannot store item {name!r}: price must be a number and purchased a bool")
+            prices.append(price)
+            names.append(strings.id(name))
+            categories.append(strings.id(category))
+            flags.append((PURCHASED if purchased else 0) | (INTEGER_PRICE if type(price) is int else 0))
+        parts += [COUNT.pack(len(prices)), b"\0" * _pad(COUNT.size), _little_endian(prices).tobytes(),
+                  _little_endian(names).tobytes(), _little_endian(categories).tobytes(), bytes(flags),
+                  b"\0" * _pad(len(prices))]
+    return b"".join(parts)
+
+
+def write_snapshot(path, users):
+    """Write a snapshot of users, an iterable of (username, user in the JSON shape), atomically."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".snap")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(b"\0" * HEADER.size)
+            strings = _StringTable()
+            index = []
+            for username, user in users:
+                index.append((strings.id(username), file.tell()))
+                file.write(_encode_user(user, strings))
+            strings_offset = file.tell()
+            table = strings.encode()
+            file.write(table + b"\0" * _pad(len(table)))
+            index_offset = file.tell()
+            file.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in index))
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, VERSION, 0, len(index), strings_offset, index_offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Opening reads only the header, the string offsets and the user index;
+    load_user and user_json decode one user's record on demand, and
+    load_user caches the result.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, _reserved, user_count, strings_offset, index_offset = HEADER.unpack_from(self._map)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a planner snapshot")
+            if version != VERSION:
+                raise ValueError(f"{path} has snapshot version {version}; this planner reads version {VERSION}")
+        except BaseException:
+            self._file.close()
+            raise
+        (string_count,) = COUNT.unpack_from(self._map, strings_offset)
+        start = strings_offset + COUNT.size
+        self._string_ends = _little_endian(array("I", self._map[start:start + 4 * string_count]))
+        self._strings_start = start + 4 * string_count
+        self._strings = {}  # id -> decoded string, filled as strings are used
+        self._offsets = {}  # username -> record offset
+        for entry in range(user_count):
+            string_id, offset = INDEX_ENTRY.unpack_from(self._map, index_offset + entry * INDEX_ENTRY.size)
+            self._offsets[self.string(string_id)] = offset
+        self._users = {}  # username -> decoded user, see load_user
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, username):
+        return username in self._offsets
+
+    def usernames(self):
+        return list(self._offsets)
+
+    def string(self, string_id):
+        text = self._strings.get(string_id)
+        if text is None:
+            start = self._strings_start + (self._string_ends[string_id - 1] if string_id else 0)
+            end = self._strings_start + self._string_ends[string_id]
+            text = self._strings[string_id] = self._map[start:end].decode("utf-8")
+        return text
+
+    def _columns(self, username):
+        """Return a user's account fields and (list_name, fields, names, prices, flags, categories) per list."""
+        offset = self._offsets[username]
+        (size,) = COUNT.unpack_from(self._map, offset)
+        meta = json.loads(self._map[offset + COUNT.size:offset + COUNT.size + size])
+        offset += COUNT.size + size
+        offset += _pad(offset)
+        lists = []
+        for list_name, fields in meta["lists"]:
+            (count,) = COUNT.unpack_from(self._map, offset)
+            offset += COUNT.size + _pad(COUNT.size)
+            prices = _little_endian(array("d", self._map[offset:offset + 8 * count]))
+            offset += 8 * count
+            names = _little_endian(array("I", self._map[offset:offset + 4 * count]))
+            offset += 4 * count
+            categories = _little_endian(array("I", self._map[offset:offset + 4 * count]))
+            offset += 4 * count
+            flags = self._map[offset:offset + count]
+            offset += count + _pad(count)
+            lists.append((list_name, fields, [self.string(name) for name in names], prices, flags,
+                          [self.string(category) for category in categories]))
+        return meta["account"], lists
+
+    def load_user(self, username):
+        """Return a user in the in-memory shape (items as ShoppingLists), decoding it on first access."""
+        user = self._users.get(username)
+        if user is None:
+            account, lists = self._columns(username)
+            shopping_lists = {}
+            for list_name, fields, names, prices, flags, categories in lists:
+                items = ShoppingList()
+                items.extend(zip(names, prices, (flag & PURCHASED for flag in flags), categories))
+                shopping_lists[list_name] = dict(fields, items=items)
+            user = self._users[username] = dict(account, shopping_lists=shopping_lists)
+        return user
+
+    def user_json(self, username):
+        """Return a user exactly as it appeared in the JSON the snapshot was made from."""
+        account, lists = self._columns(username)
+        shopping_lists = {}
+        for list_name, fields, names, prices, flags, categories in lists:
+            items = [
+                [name, int(price) if flag & INTEGER_PRICE else price, bool(flag & PURCHASED), category]
+                for name, price, flag, category in zip(names, prices, flags, categories)
+            ]
+            shopping_lists[list_name] = dict(fields, items=items)
+        return dict(account, shopping_lists=shopping_lists)
+
+
+def json_to_snapshot(json_path, snapshot_path):
+    """Convert a users.json to a snapshot. Returns the number of users."""
+    users = read_json(json_path)
+    write_snapshot(snapshot_path, users.items())
+    return len(users)
+
+
+def snapshot_to_json(snapshot_path, json_path):
+    """Convert a snapshot back to users.json. Returns the number of users."""
+    with Snapshot(snapshot_path) as snapshot:
+        users = {username: snapshot.user_json(username) for username in snapshot.usernames()}
+    atomic_write_json(json_path, users)
+    return len(users)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between users.json, the per-user store and snapshots.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("to-binary", "users.json -> snapshot"), ("to-json", "snapshot -> users.json"),
+                            ("from-store", "data directory -> snapshot"),
+                            ("to-store", "snapshot -> data directory (users without a shard)")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("source")
+        command.add_argument("target")
+    args = parser.parse_args(argv)
+    if args.command == "to-binary":
+        count = json_to_snapshot(args.source, args.target)
+    elif args.command == "to-json":
+        count = snapshot_to_json(args.source, args.target)
+    elif args.command == "from-store":
+        count = UserStore(args.source, legacy_path=None).export_snapshot(args.target)
+    else:
+        count = UserStore(args.target, legacy_path=None).import_snapshot(args.source)
+    print(f"Converted {count} users to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
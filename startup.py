@@ -0,0 +1,65 @@
+"""Startup timing for planner.py.
+
+``python planner.py --startup-report`` starts the app, prints how long each
+startup phase took and a per-module import breakdown gathered with
+``python -X importtime``, then exits.
+"""
+import os
+import subprocess
+import sys
+import time
+
+
+class StartupTimer:
+    """Records the time since process start at named startup phases."""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = []
+
+    def mark(self, phase):
+        self.marks.append((phase, time.perf_counter() - self.start))
+
+    def report(self):
+        lines = ["Startup phases (ms since start):"]
+        previous = 0.0
+        for phase, elapsed in self.marks:
+            lines.append(f"  {phase:<28} {elapsed * 1000:9.1f}  (+{(elapsed - previous) * 1000:.1f})")
+            previous = elapsed
+        return "\n".join(lines)
+
+
+def import_breakdown(module="planner", top=15):
+    """Import module in a fresh interpreter with -X importtime.
+
+    Returns (total_us, rows) where rows are the top modules by cumulative
+    import time as (module, self_us, cumulative_us) tuples.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        row = (name.strip(), int(self_us), int(cumulative_us))
+        if name.strip() == module:
+            total = row[2]
+        rows.append(row)
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return total, rows[:top]
+
+
+def format_import_breakdown(module="planner", top=15):
+    total, rows = import_breakdown(module, top)
+    lines = [f"Import breakdown for {module} ({total / 1000:.1f} ms, -X importtime):",
+             f"  {'self ms':>9} {'cumul ms':>9}  module"]
+    for name, self_us, cumulative_us in rows:
+        lines.append(f"  {self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+    return "\n".join(lines)
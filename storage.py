@@ -0,0 +1,347 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from urllib.parse import quote, unquote
+
+from shopping_list import ShoppingList
+
+
+def atomic_write_json(path, data):
+    """Write JSON to a temporary file next to path, then rename it into place."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(path):
+    """Read a JSON file written by atomic_write_json."""
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+# Longest percent-encoded prefix of a name kept readable in its file name
+FILE_NAME_PREFIX = 40
+
+
+def file_name(name):
+    """Map a username or list name to a portable file name.
+
+    The file name is a short percent-encoded prefix of the name followed by a
+    hash of the exact name, so names that differ only in case get different
+    files on case-insensitive file systems, reserved names such as "CON" or
+    ".." are never used as is, and long names stay well under the 255-byte
+    limit. The name itself is stored inside the file.
+    """
+    digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:16]
+    prefix = quote(name, safe="")[:FILE_NAME_PREFIX]
+    escape = prefix.find("%", len(prefix) - 2)
+    if escape != -1:
+        prefix = prefix[:escape]  # Do not cut a %XX escape in half
+    return f"{prefix}-{digest}"
+
+
+def decode_list(data):
+    """Convert a list record from its JSON shape to the in-memory shape."""
+    data["items"] = ShoppingList.from_json(data["items"])
+    return data
+
+
+def encode_list(shopping_list):
+    """Convert an in-memory list record back to its JSON shape.
+
+    The stored "spent" and "categories" fields are refreshed from the list's
+    running totals; categories maps each category to its spent and pending
+    amounts.
+    """
+    items = shopping_list["items"]
+    categories = {category: {"spent": spent, "pending": pending}
+                  for category, (spent, pending) in items.category_totals().items()}
+    return dict(shopping_list, items=items.to_json(), spent=items.spent, categories=categories)
+
+
+class UserStore:
+    """Per-user sharded storage for accounts and shopping lists.
+
+    Layout::
+
+        <root>/users/<user>/user.json          account data and list order
+        <root>/users/<user>/lists/<list>.json  one file per shopping list
+        <root>/users/<user>/wal.log            changes not yet folded into the shard
+        <root>/users/<user>/sync.json          household sync state (see sync.SyncClient)
+        <root>/credentials.json                password hashes (see auth.CredentialStore)
+        <root>/users.snap                      optional read-only snapshot (see snapshot.py)
+
+    Users in the snapshot who have no shard yet are served from it: their
+    shard is written from the snapshot the first time their account is read,
+    so only the users who log in are ever decoded.
+
+    File names come from file_name(), and each file records the name it
+    belongs to. Every file is written atomically, so saving one list never
+    rewrites another list or another user.
+    """
+
+    def __init__(self, root="data", legacy_path="users.json", snapshot_path=None):
+        self.root = root
+        self.legacy_path = legacy_path
+        self.users_dir = os.path.join(root, "users")
+        self.credentials_path = os.path.join(root, "credentials.json")
+        self.snapshot_path = snapshot_path or os.path.join(root, "users.snap")
+        self._snapshot = None  # snapshot.Snapshot, opened on first use
+        self._snapshot_lock = threading.Lock()
+
+    # Paths
+
+    def user_dir(self, username):
+        return os.path.join(self.users_dir, file_name(username))
+
+    def user_path(self, username):
+        return os.path.join(self.user_dir(username), "user.json")
+
+    def lists_dir(self, username):
+        return os.path.join(self.user_dir(username), "lists")
+
+    def list_path(self, username, list_name):
+        return os.path.join(self.lists_dir(username), file_name(list_name) + ".json")
+
+    def wal_path(self, username):
+        return os.path.join(self.user_dir(username), "wal.log")
+
+    def sync_path(self, username):
+        return os.path.join(self.user_dir(username), "sync.json")
+
+    # Users
+
+    def has_shard(self, username):
+        """True if the user has a shard, as opposed to existing only in the snapshot."""
+        return os.path.exists(self.user_path(username))
+
+    def user_exists(self, username):
+        if self.has_shard(username):
+            return True
+        snapshot = self.snapshot()
+        return snapshot is not None and username in snapshot
+
+    def usernames(self):
+        """Return the names of all stored users, reading only account records and the snapshot index."""
+        usernames = set()
+        if os.path.isdir(self.users_dir):
+            for entry in os.listdir(self.users_dir):
+                path = os.path.join(self.users_dir, entry, "user.json")
+                if os.path.exists(path):
+                    usernames.add(read_json(path)["username"])
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            usernames.update(snapshot.usernames())
+        return sorted(usernames)
+
+    def create_user(self, username):
+        """Create an empty account shard. Returns the in-memory user dict."""
+        user = {"shopping_lists": {}}
+        self.save_user(username, user)
+        return user
+
+    def load_account(self, username):
+        """Load only the account record (no list data) for a user."""
+        self._shard_from_snapshot(username)
+        return read_json(self.user_path(username))
+
+    def load_user(self, username):
+        """Load one user's account and all of their shopping lists."""
+        account = self.load_account(username)
+        shopping_lists = {}
+        for list_name in account.get("lists", []):
+            path = self.list_path(username, list_name)
+            if os.path.exists(path):
+                shopping_lists[list_name] = self.load_list(username, list_name)
+        user = {key: value for key, value in account.items() if key not in ("lists", "username")}
+        user["shopping_lists"] = shopping_lists
+        return user
+
+    def save_user(self, username, user, dirty_lists=None):
+        """Save a user's account and lists.
+
+        If dirty_lists is given, only those lists are rewritten; lists that are
+        no longer present in the user dict have their files removed.
+        """
+        shopping_lists = user["shopping_lists"]
+        if dirty_lists is None:
+            dirty_lists = shopping_lists.keys()
+        for list_name in dirty_lists:
+            if list_name in shopping_lists:
+                self.save_list(username, list_name, shopping_lists[list_name])
+        self.save_account(username, user)
+        self._remove_stale_lists(username, shopping_lists)
+
+    def save_account(self, username, user):
+        """Rewrite the small account record, including the list order."""
+        account = {key: value for key, value in user.items() if key != "shopping_lists"}
+        account["lists"] = list(user["shopping_lists"])
+        self.write_account(username, account)
+
+    def write_account(self, username, account):
+        """Write an account record as returned by load_account."""
+        atomic_write_json(self.user_path(username), dict(account, username=username))
+
+    # Lists
+
+    def load_list(self, username, list_name):
+        """Load one of a user's shopping lists."""
+        data = read_json(self.list_path(username, list_name))
+        data.pop("name", None)
+        return decode_list(data)
+
+    def save_list(self, username, list_name, shopping_list):
+        atomic_write_json(self.list_path(username, list_name), dict(encode_list(shopping_list), name=list_name))
+
+    def delete_list(self, username, list_name):
+        path = self.list_path(username, list_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _remove_stale_lists(self, username, shopping_lists):
+        lists_dir = self.lists_dir(username)
+        if not os.path.isdir(lists_dir):
+            return
+        current = {file_name(list_name) + ".json" for list_name in shopping_lists}
+        for entry in os.listdir(lists_dir):
+            if entry.endswith(".json") and entry not in current:
+                os.remove(os.path.join(lists_dir, entry))
+
+    # Snapshot
+
+    def snapshot(self):
+        """Return the snapshot at snapshot_path, opening it on first use, or None if there is none."""
+        with self._snapshot_lock:
+            if self._snapshot is None and os.path.exists(self.snapshot_path):
+                from snapshot import Snapshot
+
+                self._snapshot = Snapshot(self.snapshot_path)
+            return self._snapshot
+
+    def _shard_from_snapshot(self, username):
+        """Write a user's shard from the snapshot if they do not have one yet."""
+        if self.has_shard(username):
+            return
+        snapshot = self.snapshot()
+        if snapshot is None or username not in snapshot:
+            return
+        with self._snapshot_lock:
+            if not os.path.exists(self.user_path(username)):
+                self._migrate_user(username, snapshot.user_json(username))
+
+    def export_snapshot(self, path):
+        """Write every user, from their shard or else the snapshot, to a snapshot at path.
+
+        Users are read one at a time, and users who only exist in the current
+        snapshot are copied without writing their shard. Returns the number of users.
+        """
+        from snapshot import write_snapshot
+
+        usernames = self.usernames()
+        snapshot = self.snapshot()
+
+        def users():
+            for username in usernames:
+                if self.has_shard(username):
+                    yield username, self.load_user(username)
+                else:
+                    yield username, snapshot.user_json(username)
+
+        write_snapshot(path, users())
+        return len(usernames)
+
+    def import_snapshot(self, path):
+        """Write a shard for every user in the snapshot at path who does not have one. Returns the count."""
+        from snapshot import Snapshot
+
+        count = 0
+        with Snapshot(path) as snapshot:
+            for username in snapshot.usernames():
+                if not self.has_shard(username):
+                    self._migrate_user(username, snapshot.user_json(username))
+                    count += 1
+        return count
+
+    # Migration
+
+    def migrate_layout(self):
+        """Rename shards written with the old percent-encoded file names.
+
+        Old account records do not hold the username; it is decoded from the
+        directory name, as are list names from their file names. Returns the
+        number of users moved.
+        """
+        if not os.path.isdir(self.users_dir):
+            return 0
+        moved = 0
+        for entry in os.listdir(self.users_dir):
+            directory = os.path.join(self.users_dir, entry)
+            path = os.path.join(directory, "user.json")
+            if not os.path.exists(path):
+                continue
+            account = read_json(path)
+            username = account.get("username")
+            if username is None:
+                username = unquote(entry)
+                lists_dir = os.path.join(directory, "lists")
+                old_names = os.listdir(lists_dir) if os.path.isdir(lists_dir) else []
+                for old_name in old_names:
+                    if old_name.endswith(".json") and not old_name.startswith(".tmp-"):
+                        list_name = unquote(old_name[:-len(".json")])
+                        os.replace(os.path.join(lists_dir, old_name),
+                                   os.path.join(lists_dir, file_name(list_name) + ".json"))
+                atomic_write_json(path, dict(account, username=username))  # Marks the lists as moved
+            if entry != file_name(username):
+                os.replace(directory, os.path.join(self.users_dir, file_name(username)))
+                moved += 1
+        return moved
+
+    def migrate_legacy(self):
+        """Split a monolithic users.json into per-user shards.
+
+        The legacy file may also be a binary snapshot (see snapshot.py). If
+        there is no snapshot at snapshot_path yet, it is simply moved there
+        and its users are served from it lazily; otherwise the users not
+        migrated yet are decoded. A legacy file that was decoded is renamed
+        to ``<legacy_path>.migrated`` so the migration only ever runs once.
+        Returns the number of users migrated.
+        """
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return 0
+        from snapshot import Snapshot, is_snapshot
+
+        if is_snapshot(self.legacy_path) and not os.path.exists(self.snapshot_path):
+            os.makedirs(self.root, exist_ok=True)
+            os.replace(self.legacy_path, self.snapshot_path)
+            return len(self.snapshot())
+        if is_snapshot(self.legacy_path):
+            with Snapshot(self.legacy_path) as snapshot:
+                count = len(snapshot)
+                for username in snapshot.usernames():
+                    if not self.user_exists(username):
+                        self._migrate_user(username, snapshot.user_json(username))
+        else:
+            users = read_json(self.legacy_path)
+            count = len(users)
+            for username, user in users.items():
+                if not self.user_exists(username):
+                    self._migrate_user(username, user)
+        os.replace(self.legacy_path, self.legacy_path + ".migrated")
+        return count
+
+    def _migrate_user(self, username, user):
+        for shopping_list in user["shopping_lists"].values():
+            decode_list(shopping_list)
+        self.save_user(username, user)
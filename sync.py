@@ -0,0 +1,381 @@
+"""Optional household sync: per-list change deltas replicated through a server.
+
+Every local change is turned into one or more deltas, each addressing one
+field of one list -- whether the list exists, its budget, or one item by
+name -- and stamped with a version ``[clock, replica]``: a Lamport clock and
+the id of the machine that made the change. The server keeps, per field, the
+delta with the highest version (last writer wins, per item), and numbers
+every accepted delta with a per-space sequence number. A space is the
+namespace that is shared; a household uses one space name on every machine.
+
+A client pushes its queued deltas in batches, then asks for everything with
+a sequence number above the last one it has seen. Lists that did not change
+since then are not sent at all, so startup only downloads changed lists.
+
+SyncServer is the reference server. It can be used in-process as a
+transport (it has the same push/changes methods as HTTPTransport) or served
+over HTTP with serve(); ``python sync.py --port 8765`` runs one on localhost.
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from storage import atomic_write_json, read_json
+
+
+class SyncError(Exception):
+    """The sync server could not be reached or rejected a request."""
+
+
+def _item_value(item):
+    """Delta value of an item tuple: everything but the name, which addresses it."""
+    return [item[1], item[2], item[3]]
+
+
+class SyncServer:
+    """Reference sync server holding every space in memory.
+
+    Per list it stores the winning version of "list" (whether it exists),
+    "budget" and each item (deleted items are kept as tombstones so a late,
+    older delta cannot bring them back). Deleting a list also records the delete's version as
+    "cleared"; item deltas older than that are dropped. If path is given the
+    state is saved there after every push and loaded on start.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._spaces = read_json(path) if path and os.path.exists(path) else {}
+
+    def push(self, space, deltas):
+        """Merge deltas into a space. Returns the space's latest sequence number."""
+        with self._lock:
+            state = self._spaces.setdefault(space, {"seq": 0, "lists": {}})
+            for delta in deltas:
+                self._merge(state, delta)
+            if self.path:
+                atomic_write_json(self.path, self._spaces)
+            return state["seq"]
+
+    def _merge(self, state, delta):
+        version = delta["version"]
+        lists = state["lists"]
+        record = lists.get(delta["list"])
+        if record is None:
+            record = lists[delta["list"]] = {"seq": 0, "cleared": [0, ""], "cleared_seq": 0, "items": {}}
+        if delta["kind"] == "item":
+            entries = record["items"]
+            key = delta["name"]
+            if version < record["cleared"]:
+                return
+        else:
+            entries = record
+            key = delta["kind"]
+        current = entries.get(key)
+        if current is not None and version <= current[1]:
+            return
+        state["seq"] += 1
+        entries[key] = [state["seq"], version, delta["value"]]
+        record["seq"] = state["seq"]
+        if delta["kind"] == "list" and not delta["value"] and version > record["cleared"]:
+            record["cleared"] = version
+            record["cleared_seq"] = state["seq"]
+            record["items"] = {name: entry for name, entry in record["items"].items() if entry[1] > version}
+
+    def changes(self, space, since=0):
+        """Return the fields of every list changed after sequence number since.
+
+        The result is ``{"seq": latest, "lists": {name: changes}}`` where
+        changes may hold "list" (whether it exists) and "budget" as
+        [version, value], "items" as
+        {name: [version, value or None]}, and "cleared" (with every live item)
+        if the list was deleted since then.
+        """
+        with self._lock:
+            state = self._spaces.get(space, {"seq": 0, "lists": {}})
+            lists = {}
+            for list_name, record in state["lists"].items():
+                if record["seq"] <= since:
+                    continue
+                cleared = record["cleared_seq"] > since
+                changes = {
+                    key: [record[key][1], record[key][2]]
+                    for key in ("list", "budget") if key in record and (record[key][0] > since or cleared)
+                }
+                changes["items"] = {
+                    name: [entry[1], entry[2]] for name, entry in record["items"].items()
+                    if entry[0] > since or (cleared and entry[2] is not None)
+                }
+                if cleared:
+                    changes["cleared"] = record["cleared"]
+                lists[list_name] = changes
+            return {"seq": state["seq"], "lists": lists}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse pooled connections
+
+    def _space(self, suffix):
+        parts = urlsplit(self.path)
+        prefix = "/spaces/"
+        if not (parts.path.startswith(prefix) and parts.path.endswith(suffix)):
+            return None, parts
+        return unquote(parts.path[len(prefix):-len(suffix)]), parts
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        space, parts = self._space("/changes")
+        if space is None:
+            self._reply(404, {"error": "not found"})
+            return
+        since = int(parse_qs(parts.query).get("since", ["0"])[0])
+        self._reply(200, self.server.sync.changes(space, since))
+
+    def do_POST(self):
+        space, _parts = self._space("/deltas")
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if space is None:
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            deltas = json.loads(body)["deltas"]
+        except (ValueError, KeyError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        self._reply(200, {"seq": self.server.sync.push(space, deltas)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(sync_server, host="127.0.0.1", port=8765):
+    """Serve a SyncServer over HTTP on a background thread. Returns the HTTP server; call shutdown() to stop."""
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    httpd.sync = sync_server
+    threading.Thread(target=httpd.serve_forever, name="sync-server", daemon=True).start()
+    return httpd
+
+
+class HTTPTransport:
+    """Talks to a sync server over HTTP, reusing up to pool_size keep-alive connections."""
+
+    def __init__(self, url, pool_size=4, timeout=5.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _request(self, method, path, data=None):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            try:
+                connection.request(method, self.prefix + path, body, headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                connection.close()  # A pooled connection the server has closed; retry once
+                connection.request(method, self.prefix + path, body, headers)
+                response = connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            raise SyncError(f"Could not reach the sync server: {e}") from None
+        if response.status != 200:
+            connection.close()
+            raise SyncError(f"Sync server returned {response.status}: {payload[:200]!r}")
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+        return json.loads(payload)
+
+    def push(self, space, deltas):
+        return self._request("POST", f"/spaces/{quote(space, safe='')}/deltas", {"deltas": deltas})["seq"]
+
+    def changes(self, space, since=0):
+        return self._request("GET", f"/spaces/{quote(space, safe='')}/changes?since={since}")
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SyncClient:
+    """One user's side of the sync: the outgoing delta queue and what has been pulled.
+
+    record() turns each write-ahead log record into deltas. exchange() does
+    the network round trip (push in batches of batch_size, then pull) and is
+    safe to run on a worker thread; resolve() turns what was pulled into log
+    records for PlannerCore to apply, dropping this replica's own changes and
+    anything beaten by a local change that has not been pushed yet.
+
+    The replica id, clock, last sequence number seen and unpushed deltas are
+    kept in a small JSON file at state_path.
+    """
+
+    def __init__(self, transport, space, state_path, batch_size=500):
+        self.transport = transport
+        self.space = space
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()  # Guards the outbox, which exchange() reads from a worker thread
+        self._push_lock = threading.Lock()  # One push at a time, so batches leave the outbox in order
+        state = read_json(state_path) if os.path.exists(state_path) else {}
+        self.is_new = not state  # Never synced; the caller should seed() the local lists
+        self.replica = state.get("replica") or uuid.uuid4().hex
+        self.clock = state.get("clock", 0)
+        self.seq = state.get("seq", 0)
+        self.outbox = state.get("outbox", [])
+        self._pending = {}  # (list, kind, name) -> version of the newest unpushed delta
+        for delta in self.outbox:
+            self._pending[self._key(delta)] = delta["version"]
+
+    @staticmethod
+    def _key(delta):
+        return delta["list"], delta["kind"], delta.get("name")
+
+    def save_state(self):
+        with self._lock:
+            state = {"replica": self.replica, "clock": self.clock, "seq": self.seq, "outbox": list(self.outbox)}
+        atomic_write_json(self.state_path, state)
+
+    # Outgoing
+
+    def _queue(self, list_name, kind, value, name=None):
+        self.clock += 1
+        delta = {"list": list_name, "kind": kind, "value": value, "version": [self.clock, self.replica]}
+        if name is not None:
+            delta["name"] = name
+        with self._lock:
+            self.outbox.append(delta)
+            self._pending[self._key(delta)] = delta["version"]
+
+    def record(self, record, shopping_lists):
+        """Queue the deltas for one write-ahead log record, reading item state from shopping_lists."""
+        op = record["op"]
+        list_name = record["list"]
+        if op in ("add_list", "delete_list"):
+            self._queue(list_name, "list", op == "add_list")
+        elif op == "set_budget":
+            self._queue(list_name, "budget", record["budget"])
+        elif op in ("add_item", "put_item"):
+            self._queue(list_name, "item", _item_value(record["item"]), record["item"][0])
+        elif op == "add_items":
+            for item in record["items"]:
+                self._queue(list_name, "item", _item_value(item), item[0])
+        elif op == "remove_item":
+            self._queue(list_name, "item", None, record["name"])
+        elif op == "purchase_item":
+            items = shopping_lists[list_name]["items"]
+            self._queue(list_name, "item", _item_value(items[items.index(record["name"])]), record["name"])
+
+    def seed(self, shopping_lists):
+        """Queue every local list in full; used the first time a user syncs."""
+        for list_name, shopping_list in shopping_lists.items():
+            self._queue(list_name, "list", True)
+            self._queue(list_name, "budget", shopping_list["budget"])
+            for item in shopping_list["items"]:
+                self._queue(list_name, "item", _item_value(item), item[0])
+
+    # Network
+
+    def push(self):
+        """Send queued deltas, batch_size per request. Returns the number sent."""
+        with self._push_lock:
+            with self._lock:
+                outbox = list(self.outbox)
+            for start in range(0, len(outbox), self.batch_size):
+                batch = outbox[start:start + self.batch_size]
+                self.transport.push(self.space, batch)
+                with self._lock:
+                    del self.outbox[:len(batch)]
+                    for delta in batch:
+                        if self._pending.get(self._key(delta)) == delta["version"]:
+                            del self._pending[self._key(delta)]
+            return len(outbox)
+
+    def exchange(self):
+        """Push queued deltas, then pull everything changed since the last pull. Returns the pulled changes."""
+        self.push()
+        return self.transport.changes(self.space, self.seq)
+
+    # Incoming
+
+    def _wins(self, list_name, kind, version, name=None):
+        """True unless the change is our own echoed back or an unpushed local delta for the field is newer."""
+        self.clock = max(self.clock, version[0])
+        if version[1] == self.replica:
+            return False  # Already applied locally when it was recorded
+        with self._lock:
+            local = self._pending.get((list_name, kind, name))
+        return local is None or version > local
+
+    def resolve(self, changes, shopping_lists):
+        """Turn pulled changes into write-ahead log records for the local lists."""
+        records = []
+        for list_name, fields in changes["lists"].items():
+            exists = list_name in shopping_lists
+            if "cleared" in fields and self._wins(list_name, "list", fields["cleared"]) and exists:
+                records.append({"op": "delete_list", "list": list_name})
+                exists = False
+            if "list" in fields:
+                version, value = fields["list"]
+                if self._wins(list_name, "list", version) and value != exists:
+                    records.append({"op": "add_list" if value else "delete_list", "list": list_name})
+                    exists = value
+            if not exists:
+                continue
+            if "budget" in fields:
+                version, value = fields["budget"]
+                if self._wins(list_name, "budget", version):
+                    records.append({"op": "set_budget", "list": list_name, "budget": value})
+            for name, (version, value) in fields.get("items", {}).items():
+                if not self._wins(list_name, "item", version, name):
+                    continue
+                if value is None:
+                    records.append({"op": "remove_item", "list": list_name, "name": name})
+                else:
+                    records.append({"op": "put_item", "list": list_name, "item": [name, *value]})
+        self.seq = max(self.seq, changes["seq"])
+        return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the reference household sync server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--state", help="JSON file to keep the server's data in (default: memory only)")
+    args = parser.parse_args(argv)
+    httpd = serve(SyncServer(args.state), args.host, args.port)
+    print(f"Sync server listening on http://{args.host}:{httpd.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Tests for the columnar ShoppingList and its running totals.
+
+Run from the repository root with ``python -m unittest discover tests``.
+"""
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from shopping_list import Bitmap, ShoppingList  # noqa: E402
+
+
+class BitmapTest(unittest.TestCase):
+    def test_delete_shifts_later_bits(self):
+        rng = random.Random(4)
+        bitmap = Bitmap()
+        expected = [rng.random() < 0.5 for _ in range(77)]
+        for value in expected:
+            bitmap.append(value)
+        while expected:
+            row = rng.randrange(len(expected))
+            bitmap.delete(row)
+            del expected[row]
+            self.assertEqual(len(bitmap), len(expected))
+            self.assertEqual([bitmap[row] for row in range(len(bitmap))], expected)
+            self.assertEqual(bitmap.count(), sum(expected))
+            self.assertEqual(len(bitmap.bits), (len(expected) + 7) >> 3)
+
+
+class ShoppingListTest(unittest.TestCase):
+    def test_mutations_keep_aggregates(self):
+        rng = random.Random(7)
+        categories = ["Groceries", "Health", "Other"]
+        items = ShoppingList()
+        for step in range(400):
+            action = rng.random()
+            if action < 0.4 or not items:
+                items.append(f"item-{step}", round(rng.uniform(0, 50), 2), rng.random() < 0.3, rng.choice(categories))
+            elif action < 0.55:
+                items.extend((f"batch-{step}-{n}", rng.uniform(0, 9), rng.random() < 0.5, rng.choice(categories))
+                             for n in range(5))
+            elif action < 0.7:
+                items.remove(rng.randrange(len(items)))
+            elif action < 0.85:
+                items.mark_purchased(rng.randrange(len(items)))
+            else:
+                items.update(rng.randrange(len(items)), rng.uniform(0, 20), rng.random() < 0.5, rng.choice(categories))
+            items.check_aggregates()
+            self.assertEqual([items.index(item[0]) for item in items], list(range(len(items))))
+
+    def test_check_aggregates_detects_drift(self):
+        items = ShoppingList([("milk", 2.5, True, "Groceries")])
+        items.spent += 1
+        with self.assertRaises(ValueError):
+            items.check_aggregates()
+
+    def test_json_round_trip(self):
+        data = [["milk", 2.5, True, "Groceries"], ["soap", 3.0, False, "Health"]]
+        self.assertEqual(ShoppingList.from_json(data).to_json(), data)
+
+if __name__ == "__main__":
+    unittest.main()
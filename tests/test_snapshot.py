@@ -0,0 +1,64 @@
+"""Tests for the binary snapshot and its use as a lazy source for the per-user store."""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from snapshot import Snapshot, json_to_snapshot, snapshot_to_json  # noqa: E402
+from storage import UserStore  # noqa: E402
+
+USERS = {
+    "alice": {"password": "pw", "shopping_lists": {
+        "Weekly": {"items": [["milk", 2, True, "Groceries"], ["soap", 3.5, False, "Health"]], "budget": 10,
+                   "spent": 2, "categories": {}},
+    }},
+    "bob": {"password": "pw", "shopping_lists": {}},
+}
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.json_path = os.path.join(self._tmp.name, "users.json")
+        with open(self.json_path, "w") as file:
+            json.dump(USERS, file)
+        self.snapshot_path = os.path.join(self._tmp.name, "users.snap")
+        json_to_snapshot(self.json_path, self.snapshot_path)
+
+    def test_json_round_trip_is_lossless(self):
+        back = os.path.join(self._tmp.name, "back.json")
+        snapshot_to_json(self.snapshot_path, back)
+        with open(self.json_path) as original, open(back) as converted:
+            self.assertEqual(original.read(), converted.read())
+
+    def test_store_reads_users_from_the_snapshot_on_demand(self):
+        root = os.path.join(self._tmp.name, "data")
+        store = UserStore(root, legacy_path=self.snapshot_path)
+        store.migrate_legacy()
+        self.assertEqual(store.usernames(), ["alice", "bob"])
+        self.assertFalse(store.has_shard("alice"))
+
+        user = store.load_user("alice")
+        self.assertEqual(list(user["shopping_lists"]["Weekly"]["items"]),
+                         [("milk", 2.0, True, "Groceries"), ("soap", 3.5, False, "Health")])
+        self.assertTrue(store.has_shard("alice"))
+        self.assertFalse(store.has_shard("bob"))
+
+        exported = os.path.join(self._tmp.name, "export.snap")
+        self.assertEqual(store.export_snapshot(exported), 2)
+        with Snapshot(exported) as snapshot:
+            self.assertEqual(snapshot.usernames(), ["alice", "bob"])
+            self.assertEqual(len(snapshot.load_user("alice")["shopping_lists"]["Weekly"]["items"]), 2)
+
+        other = UserStore(os.path.join(self._tmp.name, "other"), legacy_path=None)
+        self.assertEqual(other.import_snapshot(exported), 2)
+        self.assertTrue(other.has_shard("bob"))
+
+
+if __name__ == "__main__":
+    unittest.main()
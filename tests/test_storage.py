@@ -0,0 +1,66 @@
+"""Tests for the per-user shard layout."""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from shopping_list import ShoppingList  # noqa: E402
+from storage import UserStore, file_name  # noqa: E402
+
+
+class FileNameTest(unittest.TestCase):
+    def test_names_differing_in_case_get_different_files(self):
+        self.assertNotEqual(file_name("Weekly").lower(), file_name("weekly").lower())
+
+    def test_file_names_are_short_and_never_special(self):
+        for name in (".", "..", "CON", "", "a/b", "x" * 1000, "\u00e9" * 500):
+            encoded = file_name(name)
+            self.assertLess(len(encoded.encode("utf-8")), 100)
+            self.assertNotIn("/", encoded)
+            self.assertNotIn(encoded, (".", "..", "CON"))
+
+
+class UserStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.store = UserStore(os.path.join(self._tmp.name, "data"), legacy_path=None)
+
+    def test_round_trip(self):
+        user = {"shopping_lists": {
+            "Weekly": {"items": ShoppingList([("milk", 2.0, True, "Groceries")]), "budget": 5, "spent": 0,
+                       "categories": {}},
+            "weekly": {"items": ShoppingList(), "budget": 0, "spent": 0, "categories": {}},
+        }}
+        self.store.save_user("..", user)
+        self.assertEqual(self.store.usernames(), [".."])
+        loaded = self.store.load_user("..")
+        self.assertEqual(list(loaded["shopping_lists"]), ["Weekly", "weekly"])
+        self.assertEqual(list(loaded["shopping_lists"]["Weekly"]["items"]), [("milk", 2.0, True, "Groceries")])
+        self.assertNotIn("name", loaded["shopping_lists"]["Weekly"])
+
+        del user["shopping_lists"]["weekly"]
+        self.store.save_user("..", user, set())
+        self.assertEqual(len(os.listdir(self.store.lists_dir(".."))), 1)
+
+    def test_migrate_layout_renames_percent_encoded_shards(self):
+        directory = os.path.join(self.store.users_dir, "Al%20ice")
+        os.makedirs(os.path.join(directory, "lists"))
+        with open(os.path.join(directory, "user.json"), "w") as file:
+            json.dump({"lists": ["a/b"]}, file)
+        with open(os.path.join(directory, "lists", "a%2Fb.json"), "w") as file:
+            json.dump({"items": [["milk", 2, False, "Groceries"]], "budget": 3, "spent": 0, "categories": {}}, file)
+
+        self.assertEqual(self.store.migrate_layout(), 1)
+        self.assertEqual(self.store.migrate_layout(), 0)
+        self.assertEqual(self.store.usernames(), ["Al ice"])
+        shopping_list = self.store.load_user("Al ice")["shopping_lists"]["a/b"]
+        self.assertEqual(list(shopping_list["items"]), [("milk", 2.0, False, "Groceries")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Tests for household sync between two in-process replicas."""
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("PLANNER_SCRYPT_N", "1024")  # Fast password hashing; read when auth is imported
+os.environ.setdefault("PLANNER_PBKDF2_ITERATIONS", "1000")
+
+from core import PlannerCore  # noqa: E402
+from storage import UserStore  # noqa: E402
+from sync import SyncServer  # noqa: E402
+
+
+class TempStoreMixin:
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def store(self, name="data"):
+        root = os.path.join(self._tmp.name, name)
+        return UserStore(root, legacy_path=os.path.join(root, "users.json"))
+
+class SyncTest(TempStoreMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        server = SyncServer()
+        self.alice = PlannerCore(self.store("alice"), sync_transport=server, household="home")
+        self.bob = PlannerCore(self.store("bob"), sync_transport=server, household="home")
+        self.alice.signup("alice", "pw")
+        self.bob.signup("bob", "pw")
+        self.addCleanup(self.alice.logout)
+        self.addCleanup(self.bob.logout)
+
+    def items(self, core):
+        return list(core.get_list("Weekly")["items"])
+
+    def test_own_changes_are_not_applied_twice(self):
+        self.alice.create_list("Weekly", budget=10)
+        self.alice.add_item("Weekly", "milk", "2", "Groceries")
+        self.assertEqual(self.alice.sync_now(), 0)
+        self.assertEqual(self.bob.sync_now(), 3)  # The list, its budget and the item
+        self.assertEqual(self.items(self.bob), [("milk", 2.0, False, "Groceries")])
+        self.assertEqual(self.bob.get_list("Weekly")["budget"], 10)
+
+    def test_newest_change_wins_and_replicas_converge(self):
+        self.alice.create_list("Weekly")
+        self.alice.add_item("Weekly", "milk", "2", "Groceries")
+        self.alice.add_item("Weekly", "eggs", "3", "Groceries")
+        self.alice.sync_now()
+        self.bob.sync_now()
+
+        # Concurrent edits: bob touches milk twice, so his version is newer;
+        # alice and bob each edit a different item as well.
+        self.alice.purchase_item("Weekly", self.alice.find_item("Weekly", "milk"))
+        self.bob.remove_item("Weekly", self.bob.find_item("Weekly", "milk"))
+        self.bob.add_item("Weekly", "milk", "4", "Groceries")
+        self.alice.purchase_item("Weekly", self.alice.find_item("Weekly", "eggs"))
+        self.bob.add_item("Weekly", "soap", "5", "Health")
+
+        for core in (self.alice, self.bob, self.alice):
+            core.sync_now()
+        expected = {("milk", 4.0, False, "Groceries"), ("eggs", 3.0, True, "Groceries"), ("soap", 5.0, False, "Health")}
+        self.assertEqual(set(self.items(self.alice)), expected)
+        self.assertEqual(set(self.items(self.bob)), expected)
+
+    def test_import_does_not_sync_skipped_duplicates(self):
+        self.alice.create_list("Weekly")
+        self.alice.add_item("Weekly", "milk", "2", "Groceries")
+        self.alice.sync_now()
+        self.bob.sync_now()
+        path = os.path.join(self._tmp.name, "items.csv")
+        with open(path, "w") as file:
+            file.write("name,price\nmilk,99\nbread,3\n")
+        stats = self.alice.import_items("Weekly", path)
+        self.assertEqual((stats.rows, stats.skipped), (1, 1))
+        self.alice.sync_now()
+        self.bob.sync_now()
+        expected = [("milk", 2.0, False, "Groceries"), ("bread", 3.0, False, "Other")]
+        self.assertEqual(self.items(self.alice), expected)
+        self.assertEqual(self.items(self.bob), expected)
+
+    def test_deleted_list_stays_deleted(self):
+        self.alice.create_list("Weekly")
+        self.alice.sync_now()
+        self.bob.sync_now()
+        self.bob.delete_list("Weekly")
+        self.bob.sync_now()
+        self.alice.sync_now()
+        self.assertNotIn("Weekly", self.alice.list_names())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Tests for the write-ahead log: replay after a crash and failed checkpoints."""
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("PLANNER_SCRYPT_N", "1024")  # Fast password hashing; read when auth is imported
+os.environ.setdefault("PLANNER_PBKDF2_ITERATIONS", "1000")
+
+from core import PlannerCore  # noqa: E402
+from storage import UserStore  # noqa: E402
+
+
+class TempStoreMixin:
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def store(self, name="data"):
+        root = os.path.join(self._tmp.name, name)
+        return UserStore(root, legacy_path=os.path.join(root, "users.json"))
+
+class WriteAheadLogTest(TempStoreMixin, unittest.TestCase):
+    def test_replay_after_crash(self):
+        store = self.store()
+        core = PlannerCore(store)
+        core.signup("alice", "pw")
+        core.create_list("Weekly", budget=20)
+        core.save()
+        core.add_item("Weekly", "milk", "2.5", "Groceries")
+        core.add_item("Weekly", "bread", "3", "Groceries")
+        core.purchase_item("Weekly", 0)
+        core.remove_item("Weekly", 1)
+        core.set_budget("Weekly", 30)
+        core.wal.close()  # Records reach the log, but the shard is never saved
+        with open(store.wal_path("alice"), "a") as file:
+            file.write('{"op": "add_item", "list": "Weekly", "item": ["torn"')  # Torn final record
+
+        recovered = PlannerCore(self.store())
+        recovered.load_data()
+        recovered.login("alice", "pw")
+        shopping_list = recovered.get_list("Weekly")
+        self.assertEqual(list(shopping_list["items"]), [("milk", 2.5, True, "Groceries")])
+        self.assertEqual(shopping_list["budget"], 30)
+        shopping_list["items"].check_aggregates()
+        self.assertFalse(os.path.exists(store.wal_path("alice")))
+        recovered.logout()
+
+    def test_corrupt_record_does_not_stop_replay(self):
+        store = self.store()
+        for username in ("a", "b"):
+            core = PlannerCore(store)
+            core.signup(username, "pw")
+            core.create_list("Weekly")
+            core.save()
+            core.add_item("Weekly", "milk", "2", "Groceries")
+            core.wal.close()
+            core.logout(save=False)
+        with open(store.wal_path("a"), "a") as file:
+            file.write("{not json}\n5\n" '{"op": "bogus", "list": "Weekly"}\n')
+
+        recovered = PlannerCore(self.store())
+        recovered.load_data()
+        for username in ("a", "b"):
+            recovered.login(username, "pw")
+            self.assertEqual(list(recovered.get_list("Weekly")["items"]), [("milk", 2.0, False, "Groceries")])
+            recovered.logout()
+        with open(store.wal_path("a") + ".corrupt") as file:
+            self.assertEqual(len(file.readlines()), 3)
+
+    def test_login_replays_a_log_left_by_a_failed_startup(self):
+        store = self.store()
+        core = PlannerCore(store)
+        core.signup("alice", "pw")
+        core.create_list("Weekly")
+        core.save()
+        core.add_item("Weekly", "milk", "2", "Groceries")
+        core.wal.close()
+        core.logout(save=False)
+
+        recovered = PlannerCore(self.store())  # No load_data(), as if startup replay had failed
+        recovered.login("alice", "pw")
+        recovered.save()
+        self.assertEqual(list(recovered.get_list("Weekly")["items"]), [("milk", 2.0, False, "Groceries")])
+        recovered.logout()
+
+    def test_failed_checkpoint_keeps_changes(self):
+        store = self.store()
+        core = PlannerCore(store)
+        core.signup("alice", "pw")
+        core.create_list("Weekly")
+        core.save()
+        core.add_item("Weekly", "milk", "2", "Groceries")
+
+        def fail(*args):
+            raise OSError("disk full")
+
+        save_user, store.save_user = store.save_user, fail
+        with self.assertRaises(OSError):
+            core.save()
+        store.save_user = save_user
+        core.wal.close()
+
+        recovered = PlannerCore(self.store())
+        recovered.load_data()
+        recovered.login("alice", "pw")
+        self.assertEqual(list(recovered.get_list("Weekly")["items"]), [("milk", 2.0, False, "Groceries")])
+        recovered.logout()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+
+from shopping_list import ShoppingList
+
+
+def apply_record(shopping_lists, record):
+    """Apply one logged mutation to a user's shopping_lists dict.
+
+    Records address items by name, so applying a record twice leaves the
+    lists unchanged. This makes replaying a log over a shard that already
+    contains some of its changes safe.
+    """
+    op = record["op"]
+    list_name = record["list"]
+    if op == "add_list":
+        shopping_lists.setdefault(list_name, {"items": ShoppingList(), "budget": 0, "spent": 0, "categories": {}})
+        return
+    if op == "delete_list":
+        shopping_lists.pop(list_name, None)
+        return
+
+    shopping_list = shopping_lists.get(list_name)
+    if shopping_list is None:
+        return
+    items = shopping_list["items"]
+    if op == "add_item":
+        if record["item"][0] not in items:
+            items.append(*record["item"])
+    elif op == "add_items":
+        items.extend(record["items"])
+    elif op == "put_item":
+        name, price, purchased, category = record["item"]
+        if name in items:
+            items.update(items.index(name), price, purchased, category)
+        else:
+            items.append(name, price, purchased, category)
+    elif op == "remove_item":
+        if record["name"] in items:
+            items.remove(items.index(record["name"]))
+    elif op == "purchase_item":
+        if record["name"] in items:
+            items.mark_purchased(items.index(record["name"]))
+    elif op == "set_budget":
+        shopping_list["budget"] = record["budget"]
+    else:
+        raise ValueError(f"Unknown log record: {op}")
+
+
+def read_records(path, corrupt=None):
+    """Yield the records in a log file, stopping at a torn final line.
+
+    Complete lines that are not a JSON object are skipped; if corrupt is a
+    list, they are appended to it.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as file:
+        for line in file:
+            if not line.endswith("\n"):
+                break  # Partially written record from a crash
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                if corrupt is not None:
+                    corrupt.append(line)
+                continue
+            yield record
+
+
+def quarantine_path(path):
+    """Where replay() keeps log lines it could not apply."""
+    return path + ".corrupt"
+
+
+def replay(store, username, path):
+    """Fold a user's log into their shard and truncate it. Returns the record count.
+
+    Lines that cannot be read or applied are appended to quarantine_path(path)
+    instead of stopping the replay, so one bad record never costs the rest.
+    """
+    corrupt = []
+    records = list(read_records(path, corrupt))
+    applied = 0
+    if records:
+        user = store.load_user(username)
+        touched = set()
+        for record in records:
+            try:
+                apply_record(user["shopping_lists"], record)
+            except (KeyError, TypeError, ValueError, IndexError):
+                corrupt.append(json.dumps(record) + "\n")
+                continue
+            touched.add(record["list"])
+            applied += 1
+        store.save_user(username, user, touched)
+    if corrupt:
+        with open(quarantine_path(path), "a") as file:
+            file.writelines(corrupt)
+        print(f"Moved {len(corrupt)} unreadable change log records for {username} to {quarantine_path(path)}.")
+    if os.path.exists(path):
+        os.remove(path)
+    return applied
+
+
+class WriteAheadLog:
+    """Append-only mutation log with group commit on a background thread.
+
+    append() only queues the record, so it never blocks the Tk main loop on
+    disk I/O. The writer thread flushes queued records with a single write and
+    fsync once flush_interval seconds have passed or max_pending records are
+    queued, and folds the log into the user's shard once it holds
+    compact_every records.
+    """
+
+    def __init__(self, store, username, flush_interval=0.5, max_pending=64, compact_every=1000):
+        self.store = store
+        self.username = username
+        self.path = store.wal_path(username)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.compact_every = compact_every
+
+        self.lock = threading.Lock()  # Serializes log and shard writes
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._logged = sum(1 for _ in read_records(self.path))
+
+        self._thread = threading.Thread(target=self._run, name=f"wal-{username}", daemon=True)
+        self._thread.start()
+
+    def append(self, record):
+        """Queue a mutation record for the next group commit."""
+        with self._pending_lock:
+            self._pending.append(record)
+            if len(self._pending) >= self.max_pending:
+                self._wakeup.set()
+
+    def flush(self):
+        """Write all queued records to the log and fsync it."""
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as file:
+            file.write("".join(json.dumps(record) + "\n" for record in pending))
+            file.flush()
+            os.fsync(file.fileno())
+        self._logged += len(pending)
+
+    def compact(self):
+        """Flush, then fold the log into the user's shard and truncate it."""
+        with self.lock:
+            self._flush_locked()
+            replay(self.store, self.username, self.path)
+            self._logged = 0
+
+    def checkpoint(self, save):
+        """Run save() (a full save of in-memory state) and discard the log it covers.
+
+        Queued records are flushed first and the log is removed only once
+        save() has returned, so a failed save leaves every change in the log.
+        """
+        with self.lock:
+            self._flush_locked()
+            save()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._logged = 0
+
+    def close(self):
+        """Stop the writer thread after a final flush."""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if self._logged >= self.compact_every:
+                    self.compact()
+            except Exception as e:
+                print(f"Error writing change log: {e}")